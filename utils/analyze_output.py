@@ -2,12 +2,15 @@ import os
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
+from file_catalog import get_catalog
+from band_processing import band_rows, iter_bands
 
 def analyze_output_folder():
     """
     Analisa completamente a pasta output para verificar consistência
     """
     output_dir = "output"
+    catalog = get_catalog()
     
     print("🔍 Analisando pasta output...")
     print("="*60)
@@ -26,15 +29,15 @@ def analyze_output_folder():
     print("📁 Estrutura de diretórios:")
     for dir_name in expected_dirs:
         dir_path = os.path.join(output_dir, dir_name)
-        if os.path.exists(dir_path):
-            count = len(os.listdir(dir_path))
+        if catalog.exists(dir_path):
+            count = catalog.count(dir_path)
             print(f"   ✅ {dir_name}: {count} arquivos")
         else:
             print(f"   ❌ {dir_name}: NÃO ENCONTRADO")
     
     # 2. Verificar class_names.txt
     class_file = os.path.join(output_dir, "class_names.txt")
-    if os.path.exists(class_file):
+    if catalog.exists(class_file):
         with open(class_file, 'r') as f:
             classes = f.read().strip().split('\n')
         print(f"\n📝 Classes definidas ({len(classes)}):")
@@ -47,7 +50,7 @@ def analyze_output_folder():
     print("\n🎭 Análise das máscaras:")
     
     # SegmentationClass
-    seg_class_files = os.listdir(os.path.join(output_dir, "SegmentationClass"))[:5]
+    seg_class_files = catalog.listdir(os.path.join(output_dir, "SegmentationClass"))[:5]
     print("\n   SegmentationClass (máscaras de classe):")
     for file in seg_class_files:
         mask = cv2.imread(os.path.join(output_dir, "SegmentationClass", file), cv2.IMREAD_GRAYSCALE)
@@ -55,7 +58,7 @@ def analyze_output_folder():
         print(f"     {file}: valores {unique_vals}")
     
     # SegmentationObject  
-    seg_obj_files = os.listdir(os.path.join(output_dir, "SegmentationObject"))[:5]
+    seg_obj_files = catalog.listdir(os.path.join(output_dir, "SegmentationObject"))[:5]
     print("\n   SegmentationObject (máscaras de instância):")
     for file in seg_obj_files:
         mask = cv2.imread(os.path.join(output_dir, "SegmentationObject", file), cv2.IMREAD_GRAYSCALE)
@@ -63,7 +66,7 @@ def analyze_output_folder():
         print(f"     {file}: valores {unique_vals}")
     
     # NPY files
-    npy_files = os.listdir(os.path.join(output_dir, "SegmentationClassNpy"))[:5]
+    npy_files = catalog.listdir(os.path.join(output_dir, "SegmentationClassNpy"))[:5]
     print("\n   SegmentationClassNpy (arrays NumPy):")
     for file in npy_files:
         data = np.load(os.path.join(output_dir, "SegmentationClassNpy", file))
@@ -73,9 +76,9 @@ def analyze_output_folder():
     # 4. Verificar correspondência entre arquivos
     print("\n🔗 Verificando correspondência entre diretórios:")
     
-    jpeg_files = set(f.replace('.jpg', '') for f in os.listdir(os.path.join(output_dir, "JPEGImages")))
-    seg_class_files = set(f.replace('.png', '') for f in os.listdir(os.path.join(output_dir, "SegmentationClass")))
-    npy_files = set(f.replace('.npy', '') for f in os.listdir(os.path.join(output_dir, "SegmentationClassNpy")))
+    jpeg_files = set(f.replace('.jpg', '') for f in catalog.listdir(os.path.join(output_dir, "JPEGImages")))
+    seg_class_files = set(f.replace('.png', '') for f in catalog.listdir(os.path.join(output_dir, "SegmentationClass")))
+    npy_files = set(f.replace('.npy', '') for f in catalog.listdir(os.path.join(output_dir, "SegmentationClassNpy")))
     
     print(f"   JPEGImages: {len(jpeg_files)} arquivos base")
     print(f"   SegmentationClass: {len(seg_class_files)} arquivos base")
@@ -109,8 +112,9 @@ def compare_with_train_masks():
     print("🔄 Comparando com máscaras coloridas criadas...")
     
     # Verificar se temos correspondência
-    output_seg = set(f.replace('.png', '') for f in os.listdir("output/SegmentationClass"))
-    colorful_masks = set(f.replace('_mask.png', '') for f in os.listdir("masks"))
+    catalog = get_catalog()
+    output_seg = set(f.replace('.png', '') for f in catalog.listdir("output/SegmentationClass"))
+    colorful_masks = set(f.replace('_mask.png', '') for f in catalog.listdir("masks", suffix='_mask.png'))
     
     print(f"\nArquivos na pasta output: {len(output_seg)}")
     print(f"Máscaras coloridas criadas: {len(colorful_masks)}")
@@ -126,18 +130,64 @@ def compare_with_train_masks():
         if only_masks:
             print(f"⚠️  Apenas em masks: {len(only_masks)} arquivos")
 
-def check_format_consistency():
+def _unique_banded(array, rows):
+    """
+    Valores únicos de uma máscara (ou cores únicas, se RGB) calculados faixa a faixa
+    """
+    values = set()
+    for y0, y1 in iter_bands(array.shape[0], rows):
+        band = np.asarray(array[y0:y1])
+        if band.ndim == 3:
+            # Empacota RGB em um inteiro: evita np.unique(axis=0) sobre a imagem inteira
+            band = (band[..., 0].astype(np.int32) << 16) | (band[..., 1].astype(np.int32) << 8) | band[..., 2]
+        values.update(np.unique(band).tolist())
+    return sorted(values)
+
+def check_format_consistency_banded(sample, memory_budget):
+    """
+    Versão em faixas da verificação de formatos (NPY via memmap, sem cópias da imagem inteira)
+    """
+    catalog = get_catalog()
+    
+    # PNG precisa ser decodificado inteiro, mas em escala de cinza (1 byte por pixel)
+    mask_png = cv2.imread(f"output/SegmentationClass/{sample}.png", cv2.IMREAD_GRAYSCALE)
+    mask_npy = np.load(f"output/SegmentationClassNpy/{sample}.npy", mmap_mode='r')
+    rows = band_rows(mask_png.shape[1], 8, memory_budget)
+    
+    # Concordância fundo/objeto entre PNG e NPY, faixa a faixa
+    agree = 0
+    for y0, y1 in iter_bands(mask_png.shape[0], rows):
+        agree += np.count_nonzero((mask_png[y0:y1] > 0) == (np.asarray(mask_npy[y0:y1]) > 0))
+    
+    print(f"\n{sample}:")
+    print(f"   PNG output: {mask_png.shape} - valores {_unique_banded(mask_png, rows)}")
+    print(f"   NPY output: {mask_npy.shape} - valores {_unique_banded(mask_npy, rows)}")
+    print(f"   Concordância PNG x NPY: {agree / mask_png.size:.2%}")
+    
+    # Máscara de classes gerada no modo em faixas (memmap) ou a colorida PNG
+    if catalog.exists(f"masks/{sample}_mask.npy"):
+        mask_class = np.load(f"masks/{sample}_mask.npy", mmap_mode='r')
+        print(f"   Classes (memmap): {mask_class.shape} - valores {_unique_banded(mask_class, rows)}")
+    elif catalog.exists(f"masks/{sample}_mask.png"):
+        mask_color = cv2.imread(f"masks/{sample}_mask.png")
+        print(f"   Colorida: {mask_color.shape} - valores únicos {len(_unique_banded(mask_color, rows))}")
+
+def check_format_consistency(memory_budget=None):
     """
     Verifica consistência dos formatos
+    (com memory_budget, processa as máscaras em faixas de linhas)
     """
     print("\n" + "="*60)
     print("🎯 Verificando consistência de formatos...")
     
     # Verificar se os valores nas máscaras fazem sentido
     sample_files = ['cat.0', 'dog.0']
+    catalog = get_catalog()
     
     for sample in sample_files:
-        if os.path.exists(f"output/SegmentationClass/{sample}.png"):
+        if catalog.exists(f"output/SegmentationClass/{sample}.png") and memory_budget:
+            check_format_consistency_banded(sample, memory_budget)
+        elif catalog.exists(f"output/SegmentationClass/{sample}.png"):
             # Máscara PNG
             mask_png = cv2.imread(f"output/SegmentationClass/{sample}.png", cv2.IMREAD_GRAYSCALE)
             
@@ -145,7 +195,7 @@ def check_format_consistency():
             mask_npy = np.load(f"output/SegmentationClassNpy/{sample}.npy")
             
             # Máscara colorida nossa
-            if os.path.exists(f"masks/{sample}_mask.png"):
+            if catalog.exists(f"masks/{sample}_mask.png"):
                 mask_color = cv2.imread(f"masks/{sample}_mask.png")
                 
                 print(f"\n{sample}:")
@@ -157,6 +207,7 @@ if __name__ == "__main__":
     analyze_output_folder()
     compare_with_train_masks()
     check_format_consistency()
+    get_catalog().save()
     
     print("\n" + "="*60)
     print("✅ Análise completa da pasta output concluída!")
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import stat
+import shutil
+import hashlib
+import tempfile
+from file_catalog import RACY_WINDOW_NS
+
+DEFAULT_CACHE_DIR = ".artifact_cache"
+MAX_CACHE_BYTES = 10 * 1024 ** 3
+INDEX_VERSION = 2
+HASH_CHUNK = 1024 * 1024
+
+class ArtifactCache:
+    """
+    Armazém endereçado por conteúdo: chave = hash(bytes das entradas + transformação + parâmetros).
+
+    Cada entrada guarda um ou mais arquivos gerados; os destinos recebem hard links
+    para eles (cópia se o link não for possível). Entradas pouco usadas são removidas
+    quando o tamanho total passa de max_bytes.
+
+    Os arquivos materializados (masks/, dataset_final/...) continuam graváveis, mas
+    compartilham o conteúdo com o cache: editar um in-place altera o objeto e os outros
+    links dele. Para alterar uma saída, prefira substituir o arquivo (novo arquivo no
+    lugar). Cada acerto confere tamanho e mtime gravados no put(): um objeto alterado
+    in-place é descartado e refeito na próxima vez em vez de ser reaproveitado.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, 'index.json')
+        self._objects = {}
+        self._file_hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self._objects = data['objects']
+                    self._file_hashes = data['file_hashes']
+            except (OSError, ValueError):
+                self._objects, self._file_hashes = {}, {}
+
+    def file_digest(self, path):
+        """
+        SHA-256 do conteúdo de um arquivo, memorizado por (tamanho, mtime)
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        memo = self._file_hashes.get(path)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+
+        # Arquivo alterado há pouco pode mudar de novo sem mudar o mtime: não memorizar
+        if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+            self._file_hashes[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def key(self, transform, inputs=(), params=None):
+        """
+        Chave de uma transformação: nome + parâmetros (JSON canônico) + conteúdo das entradas
+        (caminhos de arquivo ou bytes)
+        """
+        digest = hashlib.sha256()
+        digest.update(transform.encode())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        for item in inputs:
+            if isinstance(item, (bytes, bytearray)):
+                digest.update(hashlib.sha256(item).hexdigest().encode())
+            else:
+                digest.update(self.file_digest(item).encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, 'objects', key[:2], key)
+
+    def get(self, key):
+        """
+        {nome: caminho} dos arquivos de uma entrada, ou None se não estiver em cache
+        """
+        entry = self._objects.get(key)
+        if entry is None:
+            return None
+        entry_dir = self._entry_dir(key)
+        files = {name: os.path.join(entry_dir, name) for name in entry['files']}
+        for name, path in files.items():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is None or [st.st_size, st.st_mtime_ns] != [entry['files'][name], entry['mtimes'][name]]:
+                # Objeto removido ou alterado in-place (por um link materializado): refazer
+                self._objects.pop(key)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return None
+        entry['atime'] = time.time()
+        return files
+
+    def put(self, key, staging_dir):
+        """
+        Move todos os arquivos de uma pasta temporária para a entrada `key`
+        """
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        os.replace(staging_dir, entry_dir)
+
+        sizes, mtimes = {}, {}
+        for name in os.listdir(entry_dir):
+            st = os.stat(os.path.join(entry_dir, name))
+            sizes[name], mtimes[name] = st.st_size, st.st_mtime_ns
+        self._objects[key] = {'files': sizes, 'mtimes': mtimes, 'atime': time.time()}
+        return {name: os.path.join(entry_dir, name) for name in sizes}
+
+    def produce(self, transform, inputs, params, producer):
+        """
+        Retorna ({nome: caminho}, veio_do_cache). Em caso de falta, chama producer(pasta),
+        que deve gravar as saídas nessa pasta temporária; exceções descartam a pasta.
+        """
+        key = self.key(transform, inputs, params)
+        files = self.get(key)
+        if files is not None:
+            self.hits += 1
+            return files, True
+
+        self.misses += 1
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=os.path.join(self.root, 'tmp'))
+        try:
+            producer(staging_dir)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        return self.put(key, staging_dir), False
+
+    def store_file(self, path):
+        """
+        Guarda um arquivo pelo próprio conteúdo (uma cópia por conteúdo distinto) e
+        retorna o caminho dentro do cache
+        """
+        ext = os.path.splitext(path)[1]
+        name = 'data' + ext
+        # A extensão entra na chave: mesmos bytes com extensões diferentes são entradas distintas
+        files, _ = self.produce('file', [path], {'ext': ext},
+                                lambda staging: shutil.copyfile(path, os.path.join(staging, name)))
+        return files[name]
+
+    def materialize(self, cached_path, dest):
+        """
+        Cria `dest` como hard link para o arquivo em cache (cópia se não for possível)
+        """
+        if os.path.lexists(dest):
+            try:
+                os.remove(dest)
+            except PermissionError:
+                # Windows não remove arquivos somente leitura
+                os.chmod(dest, 0o644)
+                os.remove(dest)
+        try:
+            os.link(cached_path, dest)
+        except OSError:
+            shutil.copy2(cached_path, dest)
+        # Objetos de versões anteriores eram somente leitura: devolve a escrita (o modo não
+        # muda o mtime, então a verificação de get() continua valendo)
+        mode = os.stat(dest).st_mode
+        if not mode & stat.S_IWUSR:
+            os.chmod(dest, mode | stat.S_IWUSR)
+        return dest
+
+    def total_bytes(self):
+        return sum(sum(entry['files'].values()) for entry in self._objects.values())
+
+    def evict(self, max_bytes=None):
+        """
+        Remove as entradas menos usadas recentemente até caber em max_bytes
+        (destinos já materializados por hard link continuam válidos)
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.total_bytes()
+        removed = 0
+        for key in sorted(self._objects, key=lambda k: self._objects[k]['atime']):
+            if total <= max_bytes:
+                break
+            total -= sum(self._objects.pop(key)['files'].values())
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            removed += 1
+        return removed
+
+    def save(self):
+        """
+        Aplica o limite de tamanho e persiste o índice
+        """
+        self.evict()
+        os.makedirs(self.root, exist_ok=True)
+        shutil.rmtree(os.path.join(self.root, 'tmp'), ignore_errors=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'objects': self._objects,
+                       'file_hashes': self._file_hashes}, f)
+        os.replace(tmp_path, self.index_path)
+
+_cache = None
+
+def get_cache(root=DEFAULT_CACHE_DIR):
+    """
+    Cache compartilhado pelos scripts (carregado do disco na primeira chamada)
+    """
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache(root)
+    return _cache
+
+if __name__ == "__main__":
+    cache = get_cache()
+    removed = cache.evict()
+    cache.save()
+    print(f"🗄️  Cache de artefatos: {cache.root}/")
+    print(f"   📦 Entradas: {len(cache._objects)} | 💾 {cache.total_bytes() / 1024 ** 2:.1f} MB "
+          f"(limite {cache.max_bytes / 1024 ** 3:.1f} GB)")
+    print(f"   🧹 Removidas agora: {removed}")
@@ -0,0 +1,131 @@
+import os
+import zlib
+import struct
+import numpy as np
+import cv2
+from file_catalog import get_catalog
+
+# Orçamento padrão de memória de trabalho por faixa de linhas
+MEMORY_BUDGET = 64 * 1024 * 1024
+NUM_CLASSES = 3  # Fundo, Gato, Cachorro
+
+def band_rows(width, bytes_per_pixel, memory_budget=MEMORY_BUDGET):
+    """
+    Quantas linhas cabem em uma faixa respeitando o orçamento (mínimo 1)
+    """
+    return max(1, int(memory_budget // max(1, width * bytes_per_pixel)))
+
+def iter_bands(height, rows):
+    """
+    Gera intervalos (y0, y1) de faixas de linhas cobrindo a imagem
+    """
+    for y0 in range(0, height, rows):
+        yield y0, min(y0 + rows, height)
+
+class PngBandWriter:
+    """
+    Grava um PNG RGB de 8 bits faixa a faixa (IDAT comprimido em streaming com zlib),
+    sem nunca ter a imagem inteira em memória
+    """
+
+    def __init__(self, path, width, height, level=1):
+        self.file = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(level)
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, tag, data):
+        self.file.write(struct.pack('>I', len(data)) + tag + data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+    def write(self, rgb_rows):
+        """
+        Acrescenta linhas (n, largura, 3) RGB uint8, cada uma com filtro PNG "None"
+        """
+        scanlines = np.zeros((len(rgb_rows), self.width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 1:] = rgb_rows.reshape(len(rgb_rows), -1)
+        data = self.compressor.compress(scanlines)
+        if data:
+            self._chunk(b'IDAT', data)
+        self.rows_written += len(rgb_rows)
+
+    def close(self):
+        if self.rows_written != self.height:
+            self.file.close()
+            raise ValueError(f"PNG incompleto: {self.rows_written} de {self.height} linhas")
+        self._chunk(b'IDAT', self.compressor.flush())
+        self._chunk(b'IEND', b'')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+def class_counts_banded(mask, rows, num_classes=NUM_CLASSES):
+    """
+    Contagem de pixels por valor percorrendo a máscara (memmap) em faixas
+    """
+    counts = np.zeros(num_classes, dtype=np.int64)
+    for y0, y1 in iter_bands(mask.shape[0], rows):
+        band_counts = np.bincount(np.asarray(mask[y0:y1]).ravel(), minlength=num_classes)
+        if len(band_counts) > len(counts):
+            counts = np.pad(counts, (0, len(band_counts) - len(counts)))
+        counts[:len(band_counts)] += band_counts
+    return counts
+
+def color_statistics(split='train', memory_budget=MEMORY_BUDGET, dataset_dir='dataset_final'):
+    """
+    Média e desvio padrão de cor (RGB) por classe, acumulados faixa a faixa
+    """
+    print(f"🎨 Estatísticas de cor por classe ({split})...")
+    print("="*60)
+
+    images_dir = os.path.join(dataset_dir, split, 'images')
+    masks_dir = os.path.join(dataset_dir, split, 'masks_npy')
+    catalog = get_catalog()
+
+    pixel_counts = np.zeros(NUM_CLASSES, dtype=np.int64)
+    sums = np.zeros((NUM_CLASSES, 3), dtype=np.float64)
+    sums_sq = np.zeros((NUM_CLASSES, 3), dtype=np.float64)
+
+    for file in catalog.listdir(images_dir, suffix='.jpg'):
+        base_name = os.path.splitext(file)[0]
+        mask_path = os.path.join(masks_dir, f"{base_name}.npy")
+        if not catalog.exists(mask_path):
+            continue
+
+        # A imagem precisa ser decodificada inteira; a máscara é lida por memmap
+        image = cv2.imread(os.path.join(images_dir, file))
+        mask = np.load(mask_path, mmap_mode='r')
+        # Trabalho por pixel: 3 canais float64 + quadrado + índice de classe
+        rows = band_rows(image.shape[1], 3 * 8 * 2 + 8, memory_budget)
+
+        for y0, y1 in iter_bands(image.shape[0], rows):
+            labels = np.asarray(mask[y0:y1]).ravel().astype(np.int64)
+            pixels = image[y0:y1].reshape(-1, 3)[:, ::-1].astype(np.float64)
+            pixel_counts += np.bincount(labels, minlength=NUM_CLASSES)[:NUM_CLASSES]
+            for channel in range(3):
+                values = pixels[:, channel]
+                sums[:, channel] += np.bincount(labels, weights=values, minlength=NUM_CLASSES)[:NUM_CLASSES]
+                sums_sq[:, channel] += np.bincount(labels, weights=values * values, minlength=NUM_CLASSES)[:NUM_CLASSES]
+
+    safe_counts = np.maximum(pixel_counts, 1)[:, None]
+    means = sums / safe_counts
+    stds = np.sqrt(np.maximum(sums_sq / safe_counts - means ** 2, 0))
+
+    for class_id, name in enumerate(['Fundo', 'Gato', 'Cachorro'][:NUM_CLASSES]):
+        print(f"   {name}: {pixel_counts[class_id]} pixels | média RGB {np.round(means[class_id], 1)} "
+              f"| desvio {np.round(stds[class_id], 1)}")
+
+    return {'pixel_counts': pixel_counts, 'mean_rgb': means, 'std_rgb': stds}
+
+if __name__ == "__main__":
+    color_statistics('train')
@@ -0,0 +1,284 @@
+import os
+import time
+import numpy as np
+import cv2
+import torch
+import torch.nn.functional as F
+from file_catalog import get_catalog
+
+# Política padrão de augmentação (probabilidades e intervalos)
+DEFAULT_POLICY = {
+    'hflip_prob': 0.5,
+    'vflip_prob': 0.0,
+    'rotation_deg': 15.0,
+    'scale_range': (0.9, 1.1),
+    'translate_frac': 0.1,
+    'brightness': 0.2,
+    'contrast': 0.2,
+    'saturation': 0.2,
+    'gamma_range': (0.8, 1.2),
+    'noise_std': 0.0,
+}
+
+def make_rng(seed, epoch=0, batch_index=0, stream=0):
+    """
+    Cria gerador reprodutível para um batch (independe da ordem de execução)
+    """
+    return np.random.default_rng([seed, epoch, batch_index, stream])
+
+def sample_augmentation_params(batch_size, rng, policy=None):
+    """
+    Sorteia os parâmetros de augmentação de um batch inteiro de uma vez
+    """
+    policy = {**DEFAULT_POLICY, **(policy or {})}
+    n = batch_size
+
+    return {
+        'hflip': rng.random(n) < policy['hflip_prob'],
+        'vflip': rng.random(n) < policy['vflip_prob'],
+        'angle': np.deg2rad(rng.uniform(-policy['rotation_deg'], policy['rotation_deg'], n)),
+        'scale': rng.uniform(*policy['scale_range'], n),
+        'tx': rng.uniform(-policy['translate_frac'], policy['translate_frac'], n),
+        'ty': rng.uniform(-policy['translate_frac'], policy['translate_frac'], n),
+        'brightness': rng.uniform(-policy['brightness'], policy['brightness'], n),
+        'contrast': rng.uniform(1 - policy['contrast'], 1 + policy['contrast'], n),
+        'saturation': rng.uniform(1 - policy['saturation'], 1 + policy['saturation'], n),
+        'gamma': rng.uniform(*policy['gamma_range'], n),
+        'noise_std': policy['noise_std'],
+        'noise_seed': int(rng.integers(0, 2**31 - 1)),
+    }
+
+def _affine_matrices(params):
+    """
+    Monta as matrizes afins (N, 2, 3) no espaço normalizado do affine_grid
+    """
+    cos = np.cos(params['angle']) / params['scale']
+    sin = np.sin(params['angle']) / params['scale']
+    flip_x = np.where(params['hflip'], -1.0, 1.0)
+    flip_y = np.where(params['vflip'], -1.0, 1.0)
+
+    theta = np.zeros((len(cos), 2, 3), dtype=np.float32)
+    theta[:, 0, 0] = cos * flip_x
+    theta[:, 0, 1] = -sin * flip_y
+    theta[:, 0, 2] = params['tx']
+    theta[:, 1, 0] = sin * flip_x
+    theta[:, 1, 1] = cos * flip_y
+    theta[:, 1, 2] = params['ty']
+    return theta
+
+def _pixel_matrices(theta, h, w):
+    """
+    Converte as matrizes normalizadas (saída -> entrada, align_corners=False) para
+    pixels, no formato do cv2.warpAffine com WARP_INVERSE_MAP
+    """
+    # Pixel -> normalizado: u = (2x + 1) / W - 1
+    to_norm = np.array([[2 / w, 0, 1 / w - 1], [0, 2 / h, 1 / h - 1], [0, 0, 1]])
+    full = np.zeros((len(theta), 3, 3))
+    full[:, :2] = theta
+    full[:, 2, 2] = 1
+    return (np.linalg.inv(to_norm) @ full @ to_norm)[:, :2]
+
+def _color_matrix(channel_means, sat, con, bright):
+    """
+    Matriz 3x4 (escala 0-255) que aplica saturação, contraste e brilho de uma vez
+    (y = s*x + (1-s)*cinza ; z = c*(y - média(y)) + média(y) + b), para cv2.transform
+    """
+    weights = np.array([0.299, 0.587, 0.114])
+    mean = sat * np.mean(channel_means) + (1 - sat) * weights @ channel_means
+    matrix = np.zeros((3, 4))
+    matrix[:, :3] = con * (1 - sat) * weights
+    matrix[:, :3] += np.eye(3) * con * sat
+    matrix[:, 3] = mean * (1 - con) + bright * 255.0
+    return matrix
+
+def _photometric(images, params):
+    """
+    Aplica saturação, contraste, brilho, gamma e ruído em batch (imagens torch em [0, 1])
+    """
+    n = images.shape[0]
+    view = lambda key: torch.as_tensor(params[key], dtype=images.dtype, device=images.device).view(n, 1, 1, 1)
+    sat, con, bright = view('saturation'), view('contrast'), view('brightness')
+
+    # Saturação + contraste + brilho são lineares: uma única passada por pixel
+    # y = s*x + (1-s)*cinza ; z = c*(y - média(y)) + média(y) + b
+    gray = 0.299 * images[:, 0:1] + 0.587 * images[:, 1:2] + 0.114 * images[:, 2:3]
+    mean = sat * images.mean(dim=(1, 2, 3), keepdim=True) + (1 - sat) * gray.mean(dim=(1, 2, 3), keepdim=True)
+    images = images.mul_(con * sat).add_(gray * (con * (1 - sat))).add_(mean * (1 - con) + bright)
+
+    # Gamma vira uma tabela de 256 entradas por imagem aplicada com um único take
+    levels = torch.linspace(0, 1, 256, dtype=images.dtype, device=images.device).view(1, 256)
+    lut = levels.pow(view('gamma').view(n, 1))
+    index = images.mul_(255.0).add_(0.5).clamp_(0, 255).to(torch.int64)
+    index += (torch.arange(n, device=images.device) * 256).view(n, 1, 1, 1)
+
+    if params['noise_std'] > 0:
+        generator = torch.Generator().manual_seed(params['noise_seed'])
+        images = torch.take(lut, index)
+        noise = torch.randn(images.shape, generator=generator, dtype=images.dtype).to(images.device)
+        return images.add_(noise, alpha=params['noise_std']).clamp_(0, 1)
+    return torch.take(lut, index)
+
+def _augment_uint8(images, masks, params):
+    """
+    Caminho NumPy: tudo em uint8 com kernels do OpenCV. Os parâmetros e matrizes do batch
+    são calculados de uma vez; por imagem restam só warpAffine (imagem e máscara),
+    uma transformação de cor 3x4 e uma LUT de gamma, sem conversão para float.
+    """
+    n, h, w = images.shape[:3]
+    warps = _pixel_matrices(_affine_matrices(params), h, w)
+    levels = np.arange(256) / 255.0
+    luts = np.round(255.0 * levels[None] ** params['gamma'][:, None]).astype(np.uint8)
+
+    out_images = np.empty_like(images)
+    out_masks = np.empty_like(masks)
+    flags = cv2.WARP_INVERSE_MAP
+    for i in range(n):
+        # Mesma borda refletida nos dois (o conteúdo refletido leva o rótulo refletido):
+        # imagens bilinear, máscaras vizinho mais próximo
+        warped = cv2.warpAffine(images[i], warps[i], (w, h), flags=cv2.INTER_LINEAR | flags,
+                                borderMode=cv2.BORDER_REFLECT)
+        # Máscaras em outro dtype (ex.: int64) passam por uint8 imagem a imagem
+        out_masks[i] = cv2.warpAffine(masks[i].astype(np.uint8, copy=False), warps[i], (w, h),
+                                      flags=cv2.INTER_NEAREST | flags,
+                                      borderMode=cv2.BORDER_REFLECT)
+        color = _color_matrix(np.array(cv2.mean(warped)[:3]), params['saturation'][i],
+                              params['contrast'][i], params['brightness'][i])
+        cv2.LUT(cv2.transform(warped, color), luts[i], dst=out_images[i])
+
+    if params['noise_std'] > 0:
+        noise = np.random.default_rng(params['noise_seed']).standard_normal(images.shape, dtype=np.float32)
+        noisy = out_images.astype(np.float32) + noise * (params['noise_std'] * 255.0)
+        out_images = np.clip(noisy + 0.5, 0, 255).astype(np.uint8)
+    return out_images, out_masks
+
+def augment_batch(images, masks, params):
+    """
+    Aplica a mesma transformação geométrica a imagens e máscaras e a fotométrica só às imagens.
+
+    images: (N, H, W, 3) uint8 (NumPy) ou (N, 3, H, W) float em [0, 1] (torch)
+    masks:  (N, H, W) inteiros de classe (NumPy ou torch)
+    Retorna no mesmo tipo/layout da entrada. Entradas NumPy ficam em uint8 do começo ao fim
+    (OpenCV); tensores torch usam affine_grid/grid_sample em batch (ex.: já na GPU).
+    """
+    if isinstance(images, np.ndarray):
+        return _augment_uint8(images, np.asarray(masks), params)
+
+    img_t = images.float()
+    mask_t = masks
+    n, _, h, w = img_t.shape
+    theta = torch.from_numpy(_affine_matrices(params)).to(img_t.device)
+    grid = F.affine_grid(theta, (n, 1, h, w), align_corners=False)
+
+    # Imagens: bilinear | Máscaras: vizinho mais próximo (ambas com borda refletida)
+    img_t = F.grid_sample(img_t, grid, mode='bilinear', padding_mode='reflection', align_corners=False)
+    mask_out = F.grid_sample(mask_t.unsqueeze(1).float(), grid, mode='nearest',
+                             padding_mode='reflection', align_corners=False)
+    mask_out = mask_out.squeeze(1).round().to(mask_t.dtype)
+    return _photometric(img_t, params), mask_out
+
+def load_split_arrays(split='train', size=128, dataset_dir='dataset_final'):
+    """
+    Carrega imagens e máscaras NPY de um split redimensionadas para size x size
+    """
+    images_dir = os.path.join(dataset_dir, split, 'images')
+    masks_dir = os.path.join(dataset_dir, split, 'masks_npy')
+    catalog = get_catalog()
+
+    images, masks = [], []
+    for file in catalog.listdir(images_dir, suffix='.jpg'):
+        base_name = os.path.splitext(file)[0]
+        mask_path = os.path.join(masks_dir, f"{base_name}.npy")
+        if not catalog.exists(mask_path):
+            continue
+
+        img = cv2.cvtColor(cv2.imread(os.path.join(images_dir, file)), cv2.COLOR_BGR2RGB)
+        mask = np.load(mask_path).astype(np.uint8)
+        images.append(cv2.resize(img, (size, size), interpolation=cv2.INTER_LINEAR))
+        masks.append(cv2.resize(mask, (size, size), interpolation=cv2.INTER_NEAREST))
+
+    # Índices de classe em uint8: 8x menos memória e nenhuma conversão na augmentação
+    return np.stack(images), np.stack(masks)
+
+def iterate_augmented_batches(images, masks, batch_size=16, seed=42, epoch=0, policy=None):
+    """
+    Gera batches embaralhados e aumentados de forma reprodutível para uma época
+    """
+    order = make_rng(seed, epoch, stream=1).permutation(len(images))
+    for batch_index, start in enumerate(range(0, len(order), batch_size)):
+        idx = order[start:start + batch_size]
+        params = sample_augmentation_params(len(idx), make_rng(seed, epoch, batch_index), policy)
+        yield augment_batch(images[idx], masks[idx], params)
+
+def _albumentations_pipeline(policy):
+    """
+    Monta pipeline equivalente no albumentations (opcional, só para comparação)
+    """
+    try:
+        import albumentations as A
+    except ImportError:
+        return None
+
+    return A.Compose([
+        A.HorizontalFlip(p=policy['hflip_prob']),
+        A.Affine(rotate=(-policy['rotation_deg'], policy['rotation_deg']),
+                 scale=policy['scale_range'],
+                 translate_percent=(-policy['translate_frac'], policy['translate_frac']),
+                 border_mode=cv2.BORDER_REFLECT, p=1.0),
+        A.ColorJitter(brightness=policy['brightness'], contrast=policy['contrast'],
+                      saturation=policy['saturation'], hue=0.0, p=1.0),
+        A.RandomGamma(gamma_limit=(int(policy['gamma_range'][0] * 100), int(policy['gamma_range'][1] * 100)), p=1.0),
+    ])
+
+def benchmark_augmentation(split='train', batch_size=32, n_batches=20, seed=42):
+    """
+    Compara batches/s do caminho em batch contra o pipeline equivalente do albumentations
+    (uma amostra por vez, como num Dataset comum)
+    """
+    print("⏱️  Benchmark de augmentação...")
+    print("="*60)
+
+    images, masks = load_split_arrays(split)
+    print(f"📊 {len(images)} amostras carregadas de {split} ({images.shape[1]}x{images.shape[2]})")
+
+    rng = make_rng(seed)
+    idx_batches = [rng.integers(0, len(images), batch_size) for _ in range(n_batches)]
+    params_batches = [sample_augmentation_params(batch_size, make_rng(seed, 0, i)) for i in range(n_batches)]
+
+    results = {}
+
+    start = time.perf_counter()
+    for idx, params in zip(idx_batches, params_batches):
+        augment_batch(images[idx], masks[idx], params)
+    results['batch'] = n_batches / (time.perf_counter() - start)
+
+    pipeline = _albumentations_pipeline(DEFAULT_POLICY)
+    if pipeline is None:
+        print("   ⚠️  albumentations não instalado: sem referência para comparar")
+    else:
+        start = time.perf_counter()
+        for idx in idx_batches:
+            for i in idx:
+                pipeline(image=images[i], mask=masks[i])
+        results['albumentations'] = n_batches / (time.perf_counter() - start)
+
+    for name, rate in results.items():
+        print(f"   {name}: {rate:.1f} batches/s ({rate * batch_size:.0f} amostras/s)")
+
+    if 'albumentations' in results:
+        print(f"   🚀 Speedup sobre albumentations: {results['batch'] / results['albumentations']:.2f}x")
+
+    # Verificar reprodutibilidade: parâmetros sorteados de novo a partir da mesma semente
+    first = augment_batch(images[idx_batches[0]], masks[idx_batches[0]], params_batches[0])
+    again = augment_batch(images[idx_batches[0]], masks[idx_batches[0]],
+                          sample_augmentation_params(batch_size, make_rng(seed, 0, 0)))
+    same = np.array_equal(first[0], again[0]) and np.array_equal(first[1], again[1])
+    print(f"   {'✅' if same else '❌'} Reprodutibilidade com semente fixa")
+
+    # Máscaras devem continuar contendo apenas índices de classe válidos
+    valid = np.isin(first[1], np.unique(masks)).all()
+    print(f"   {'✅' if valid else '❌'} Máscaras apenas com classes válidas")
+
+    return results
+
+if __name__ == "__main__":
+    benchmark_augmentation()
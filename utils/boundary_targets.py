@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+import numpy as np
+import cv2
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from file_catalog import get_catalog
+
+# Incrementar quando o cálculo mudar: invalida todos os caches antigos
+TARGETS_VERSION = 1
+NUM_CLASSES = 3  # Fundo, Gato, Cachorro
+
+DEFAULT_PARAMS = {
+    'max_distance': 32,     # Distâncias (px) saturam aqui; SDF normalizado para [-1, 1]
+    'boundary_sigma': 5.0,  # Largura (px) da faixa com peso alto ao redor das bordas
+    'boundary_weight': 10.0,  # Peso máximo na borda (o peso mínimo é 1)
+}
+
+def targets_key(params=None):
+    """
+    Chave versionada do cache: versão do cálculo + hash dos parâmetros
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    return f"v{TARGETS_VERSION}-{digest}"
+
+def signed_distance_maps(mask, max_distance, num_classes=NUM_CLASSES):
+    """
+    SDF por classe (negativo dentro, positivo fora), saturado em max_distance e em [-1, 1]
+    """
+    sdf = np.empty((num_classes,) + mask.shape, dtype=np.float16)
+    for c in range(num_classes):
+        inside = (mask == c).astype(np.uint8)
+        if not inside.any():
+            sdf[c] = 1.0
+            continue
+        if inside.all():
+            sdf[c] = -1.0
+            continue
+        dist_out = cv2.distanceTransform(1 - inside, cv2.DIST_L2, 5)
+        dist_in = cv2.distanceTransform(inside, cv2.DIST_L2, 5)
+        sdf[c] = np.clip((dist_out - dist_in) / max_distance, -1, 1)
+    return sdf
+
+def boundary_weight_map(mask, sigma, max_weight):
+    """
+    Peso por pixel: 1 longe das bordas, até max_weight nelas (gaussiana da distância à borda).
+    Quantizado em uint8: peso = 1 + (max_weight - 1) * valor / 255
+    """
+    # Borda = pixel cuja classe difere de algum vizinho (deslocamentos vetorizados)
+    edges = np.zeros(mask.shape, dtype=bool)
+    edges[:-1] |= mask[:-1] != mask[1:]
+    edges[1:] |= mask[1:] != mask[:-1]
+    edges[:, :-1] |= mask[:, :-1] != mask[:, 1:]
+    edges[:, 1:] |= mask[:, 1:] != mask[:, :-1]
+
+    if not edges.any():
+        return np.zeros(mask.shape, dtype=np.uint8)
+
+    dist = cv2.distanceTransform((~edges).astype(np.uint8), cv2.DIST_L2, 5)
+    weight = np.exp(-(dist ** 2) / (2 * sigma ** 2))
+    return np.round(weight * 255).astype(np.uint8)
+
+def decode_weight(weight_u8, params=None):
+    """
+    Converte o mapa uint8 de volta para pesos float32 em [1, boundary_weight]
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    return 1.0 + (params['boundary_weight'] - 1.0) * weight_u8.astype(np.float32) / 255.0
+
+def mask_digest(mask_path):
+    """
+    SHA-256 do conteúdo da máscara de origem (chave de validade de cada entrada)
+    """
+    with open(mask_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _compute_one(task):
+    """
+    Worker: calcula e grava SDF + peso de borda de uma máscara
+    """
+    mask_path, output_path, params = task
+    mask = np.load(mask_path)
+    sdf = signed_distance_maps(mask, params['max_distance'])
+    weight = boundary_weight_map(mask, params['boundary_sigma'], params['boundary_weight'])
+
+    tmp_path = output_path + '.tmp.npz'
+    np.savez(tmp_path, sdf=sdf, weight=weight)
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+def targets_dir(split, params=None, dataset_dir='dataset_final'):
+    return os.path.join(dataset_dir, split, 'boundary_targets', targets_key(params))
+
+def precompute_boundary_targets(split='train', params=None, workers=None, dataset_dir='dataset_final'):
+    """
+    Pré-calcula os alvos de borda de um split em paralelo, pulando os que já estão em cache
+    """
+    print(f"📐 Calculando mapas de distância e peso de borda ({split})...")
+    print("="*60)
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    masks_dir = os.path.join(dataset_dir, split, 'masks_npy')
+    output_dir = targets_dir(split, params, dataset_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'params.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': TARGETS_VERSION, **params}, f, indent=2)
+
+    # Cada entrada vale para um conteúdo exato da máscara (não para um mtime: máscaras
+    # reescritas in-place ou hard links antigos do cache de artefatos enganariam a comparação)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    catalog = get_catalog()
+    tasks = []
+    digests = {}
+    cached = 0
+    for file in catalog.listdir(masks_dir, suffix='.npy'):
+        mask_path = os.path.join(masks_dir, file)
+        output_path = os.path.join(output_dir, file.replace('.npy', '.npz'))
+        digests[file] = mask_digest(mask_path)
+
+        if manifest.get(file) == digests[file] and os.path.exists(output_path):
+            cached += 1
+            continue
+        tasks.append((mask_path, output_path, params))
+
+    total_bytes = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for size in tqdm(pool.map(_compute_one, tasks, chunksize=8), total=len(tasks),
+                             desc="Calculando alvos"):
+                total_bytes += size
+
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(digests, f)
+    os.replace(tmp_path, manifest_path)
+    catalog.refresh(output_dir)
+
+    print(f"   ✅ Calculados: {len(tasks)} | ♻️  Em cache: {cached}")
+    if tasks:
+        print(f"   💾 {total_bytes / len(tasks) / 1024:.1f} KB por máscara em {output_dir}/")
+    return output_dir
+
+def load_boundary_targets(split, base_name, params=None, dataset_dir='dataset_final'):
+    """
+    Carrega (sdf float16 (C, H, W), peso float32 (H, W)) de uma máscara já processada
+    """
+    with np.load(os.path.join(targets_dir(split, params, dataset_dir), f"{base_name}.npz")) as data:
+        return data['sdf'], decode_weight(data['weight'], params)
+
+if __name__ == "__main__":
+    for split in ['train', 'val', 'test']:
+        if get_catalog().exists(f"dataset_final/{split}/masks_npy"):
+            precompute_boundary_targets(split)
+    get_catalog().save()
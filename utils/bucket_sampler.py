@@ -0,0 +1,203 @@
+import os
+import json
+import numpy as np
+import cv2
+import torch
+from PIL import Image
+from torch.utils.data import Dataset, Sampler, DataLoader
+from file_catalog import get_catalog
+
+SIZE_INDEX_NAME = "size_index.json"
+IGNORE_INDEX = 255          # Pixels de preenchimento na máscara (ignorados pela loss)
+BUCKET_PIXELS = 256 * 256   # Área alvo de cada bucket
+BUCKET_STEP = 32            # Lados múltiplos do passo total do encoder
+PIXEL_BUDGET = 16 * 256 * 256  # Pixels por batch (o tamanho do batch varia por bucket)
+
+def build_size_index(split='train', dataset_dir='dataset_final'):
+    """
+    Índice {nome: [largura, altura]} das imagens de um split, lendo só o cabeçalho.
+    Persistido em size_index.json; entradas só são relidas se o arquivo mudou
+    """
+    images_dir = os.path.join(dataset_dir, split, 'images')
+    index_path = os.path.join(dataset_dir, split, SIZE_INDEX_NAME)
+    catalog = get_catalog()
+
+    cached = {}
+    if catalog.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+
+    index = {}
+    read = 0
+    for file in catalog.listdir(images_dir, suffix='.jpg'):
+        stat = list(catalog.stat(os.path.join(images_dir, file)))
+        entry = cached.get(file)
+        if entry and entry[2:] == stat:
+            index[file] = entry
+            continue
+        with Image.open(os.path.join(images_dir, file)) as image:
+            index[file] = [image.width, image.height] + stat
+        read += 1
+
+    if read or len(index) != len(cached):
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        catalog.refresh(os.path.dirname(index_path))
+    return {name: tuple(entry[:2]) for name, entry in index.items()}
+
+def bucket_resolutions(max_pixels=BUCKET_PIXELS, step=BUCKET_STEP, min_side=128, max_side=512):
+    """
+    Resoluções (largura, altura) múltiplas de step com área próxima de max_pixels
+    """
+    buckets = set()
+    for width in range(min_side, max_side + 1, step):
+        height = (max_pixels // width) // step * step
+        if min_side <= height <= max_side:
+            buckets.add((width, height))
+            buckets.add((height, width))
+    return sorted(buckets, key=lambda wh: wh[0] / wh[1])
+
+def assign_buckets(sizes, buckets):
+    """
+    Bucket de cada imagem: o de proporção mais próxima (em log), vetorizado
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    image_ratios = np.log(sizes[:, 0] / sizes[:, 1])
+    bucket_ratios = np.log(np.array([w / h for w, h in buckets]))
+    return np.abs(image_ratios[:, None] - bucket_ratios[None, :]).argmin(axis=1)
+
+def fit_to_bucket(image, mask, bucket):
+    """
+    Redimensiona sem distorcer (mesma escala nos dois eixos) para caber no bucket e
+    completa o resto: imagem com 0, máscara com IGNORE_INDEX
+    """
+    bucket_w, bucket_h = bucket
+    height, width = image.shape[:2]
+    scale = min(bucket_w / width, bucket_h / height)
+    new_w = min(bucket_w, max(1, round(width * scale)))
+    new_h = min(bucket_h, max(1, round(height * scale)))
+
+    image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    mask = cv2.resize(mask, (new_w, new_h), interpolation=cv2.INTER_NEAREST)
+    image = cv2.copyMakeBorder(image, 0, bucket_h - new_h, 0, bucket_w - new_w, cv2.BORDER_CONSTANT, value=0)
+    mask = cv2.copyMakeBorder(mask, 0, bucket_h - new_h, 0, bucket_w - new_w, cv2.BORDER_CONSTANT,
+                              value=IGNORE_INDEX)
+    return image, mask
+
+class BucketedDataset(Dataset):
+    """
+    Amostras de um split na resolução do seu bucket (proporção preservada)
+    """
+
+    def __init__(self, split='train', dataset_dir='dataset_final', buckets=None):
+        self.images_dir = os.path.join(dataset_dir, split, 'images')
+        self.masks_dir = os.path.join(dataset_dir, split, 'masks_npy')
+        sizes = build_size_index(split, dataset_dir)
+
+        catalog = get_catalog()
+        self.files = [f for f in sizes if catalog.exists(os.path.join(self.masks_dir, f"{f[:-4]}.npy"))]
+        self.sizes = [sizes[f] for f in self.files]
+        self.buckets = buckets or bucket_resolutions()
+        self.bucket_ids = assign_buckets(self.sizes, self.buckets) if self.files else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, index):
+        file = self.files[index]
+        image = cv2.cvtColor(cv2.imread(os.path.join(self.images_dir, file)), cv2.COLOR_BGR2RGB)
+        mask = np.load(os.path.join(self.masks_dir, f"{file[:-4]}.npy")).astype(np.uint8)
+        image, mask = fit_to_bucket(image, mask, self.buckets[self.bucket_ids[index]])
+        return (torch.from_numpy(image).permute(2, 0, 1).float().div_(255.0),
+                torch.from_numpy(mask.astype(np.int64)))
+
+class BucketBatchSampler(Sampler):
+    """
+    Batches de um único bucket cada, com tamanho dado pelo orçamento de pixels
+    (buckets menores -> batches maiores). Ordem determinística por (seed, época)
+    """
+
+    def __init__(self, bucket_ids, buckets, pixel_budget=PIXEL_BUDGET, shuffle=True, seed=42, drop_last=False):
+        self.bucket_ids = np.asarray(bucket_ids)
+        self.buckets = buckets
+        self.pixel_budget = pixel_budget
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def batch_size_for(self, bucket_id):
+        width, height = self.buckets[bucket_id]
+        return max(1, self.pixel_budget // (width * height))
+
+    def _batches(self):
+        rng = np.random.default_rng([self.seed, self.epoch])
+        batches = []
+        for bucket_id in np.unique(self.bucket_ids):
+            indices = np.flatnonzero(self.bucket_ids == bucket_id)
+            if self.shuffle:
+                indices = rng.permutation(indices)
+            size = self.batch_size_for(bucket_id)
+            for start in range(0, len(indices), size):
+                batch = indices[start:start + size]
+                if len(batch) == size or not self.drop_last:
+                    batches.append(batch.tolist())
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        return iter(self._batches())
+
+    def __len__(self):
+        total = 0
+        for bucket_id, count in zip(*np.unique(self.bucket_ids, return_counts=True)):
+            size = self.batch_size_for(bucket_id)
+            total += count // size if self.drop_last else -(-count // size)
+        return int(total)
+
+def make_bucketed_loader(split='train', pixel_budget=PIXEL_BUDGET, num_workers=2, seed=42, epoch=0):
+    """
+    DataLoader com bucketing por proporção e tamanho de batch dinâmico
+    """
+    dataset = BucketedDataset(split)
+    sampler = BucketBatchSampler(dataset.bucket_ids, dataset.buckets, pixel_budget, seed=seed)
+    sampler.set_epoch(epoch)
+    return DataLoader(dataset, batch_sampler=sampler, num_workers=num_workers)
+
+def bucket_report(split='train', pixel_budget=PIXEL_BUDGET):
+    """
+    Distribuição dos buckets e aproveitamento de pixels x redimensionar tudo para 128x128
+    e x preencher até o maior tamanho
+    """
+    print(f"🪣 Bucketing por proporção ({split})...")
+    print("="*60)
+
+    dataset = BucketedDataset(split)
+    if not len(dataset):
+        print("❌ Nenhuma amostra com máscara")
+        return None
+    sampler = BucketBatchSampler(dataset.bucket_ids, dataset.buckets, pixel_budget)
+
+    sizes = np.array(dataset.sizes, dtype=np.float64)
+    bucket_wh = np.array([dataset.buckets[b] for b in dataset.bucket_ids], dtype=np.float64)
+    scale = np.minimum(bucket_wh[:, 0] / sizes[:, 0], bucket_wh[:, 1] / sizes[:, 1])
+    used = np.round(sizes[:, 0] * scale) * np.round(sizes[:, 1] * scale)
+    bucket_fill = used.sum() / bucket_wh.prod(axis=1).sum()
+    max_pad_fill = sizes.prod(axis=1).sum() / (len(sizes) * sizes[:, 0].max() * sizes[:, 1].max())
+
+    print(f"📊 {len(dataset)} imagens em {len(np.unique(dataset.bucket_ids))} buckets | {len(sampler)} batches")
+    for bucket_id, count in zip(*np.unique(dataset.bucket_ids, return_counts=True)):
+        width, height = dataset.buckets[bucket_id]
+        print(f"   {width}x{height}: {count} imagens | batch {sampler.batch_size_for(bucket_id)}")
+    print(f"\n   ✅ Pixels úteis nos buckets: {bucket_fill:.1%}")
+    print(f"   📦 Pixels úteis preenchendo até o maior tamanho: {max_pad_fill:.1%}")
+    print(f"   🔍 Pixels por amostra: {bucket_wh.prod(axis=1).mean():.0f} (vs {128 * 128} em 128x128)")
+    return {'bucket_fill': bucket_fill, 'max_pad_fill': max_pad_fill, 'batches': len(sampler)}
+
+if __name__ == "__main__":
+    bucket_report('train')
+    get_catalog().save()
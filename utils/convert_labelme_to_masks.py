@@ -4,6 +4,37 @@ import numpy as np
 from PIL import Image, ImageDraw
 import cv2
 from tqdm import tqdm
+from file_catalog import get_catalog
+from band_processing import MEMORY_BUDGET, band_rows, iter_bands, PngBandWriter
+from artifact_cache import get_cache
+
+# Definir cores RGB para cada classe
+CLASS_COLORS = {
+    'cat': (255, 0, 0),      # Gato = Vermelho
+    'dog': (0, 255, 0)       # Cachorro = Verde
+}
+# Índices de classe no formato masks_npy
+CLASS_IDS = {'gato': 1, 'cachorro': 2}
+# Incrementar ao mudar a rasterização: invalida as máscaras em cache
+MASK_VERSION = 1
+
+def get_shape_class(json_path, label):
+    """
+    Determina (cor, nome) da classe pelo nome do arquivo, com fallback no label
+    """
+    label = label.lower()
+    filename = os.path.basename(json_path).lower()
+    if 'cat' in filename:
+        return CLASS_COLORS['cat'], "gato"
+    elif 'dog' in filename:
+        return CLASS_COLORS['dog'], "cachorro"
+    
+    # Fallback: usar label se disponível
+    if 'cat' in label or 'gato' in label:
+        return CLASS_COLORS['cat'], "gato"
+    elif 'dog' in label or 'cachorro' in label:
+        return CLASS_COLORS['dog'], "cachorro"
+    return CLASS_COLORS['cat'], "gato"  # Default para gato
 
 def json_to_mask(json_path, output_dir):
     """
@@ -20,37 +51,11 @@ def json_to_mask(json_path, output_dir):
         # Criar máscara vazia RGB (fundo = preto)
         mask = np.zeros((img_height, img_width, 3), dtype=np.uint8)
         
-        # Definir cores RGB para cada classe
-        class_colors = {
-            'cat': (255, 0, 0),      # Gato = Vermelho
-            'dog': (0, 255, 0)       # Cachorro = Verde
-        }
-        
         # Processar cada shape/anotação
         for shape in data['shapes']:
             if shape['shape_type'] == 'polygon':
-                # Obter label da anotação
-                label = shape['label'].lower()
-                
-                # Determinar cor da classe baseado no nome do arquivo
-                filename = os.path.basename(json_path).lower()
-                if 'cat' in filename:
-                    class_color = class_colors['cat']
-                    class_name = "gato"
-                elif 'dog' in filename:
-                    class_color = class_colors['dog']
-                    class_name = "cachorro"
-                else:
-                    # Fallback: usar label se disponível
-                    if 'cat' in label or 'gato' in label:
-                        class_color = class_colors['cat']
-                        class_name = "gato"
-                    elif 'dog' in label or 'cachorro' in label:
-                        class_color = class_colors['dog']
-                        class_name = "cachorro"
-                    else:
-                        class_color = class_colors['cat']  # Default para gato
-                        class_name = "gato"
+                # Determinar cor da classe (nome do arquivo, com fallback no label)
+                class_color, class_name = get_shape_class(json_path, shape['label'])
                 
                 # Converter pontos para formato correto
                 points = [(int(point[0]), int(point[1])) for point in shape['points']]
@@ -71,8 +76,10 @@ def json_to_mask(json_path, output_dir):
         
         cv2.imwrite(mask_path, mask)
         
-        # Verificar cores presentes na máscara
-        unique_pixels = np.unique(mask.reshape(-1, 3), axis=0)
+        # Verificar cores presentes na máscara (RGB empacotado em um inteiro: np.unique 1D,
+        # bem mais rápido que np.unique(axis=0))
+        packed = (mask[..., 0].astype(np.int32) << 16) | (mask[..., 1].astype(np.int32) << 8) | mask[..., 2]
+        unique_pixels = [np.array([(v >> 16) & 255, (v >> 8) & 255, v & 255]) for v in np.unique(packed)]
         colors_found = []
         for pixel in unique_pixels:
             if np.array_equal(pixel, [0, 0, 0]):
@@ -87,9 +94,101 @@ def json_to_mask(json_path, output_dir):
     except Exception as e:
         return False, f"Erro ao processar {json_path}: {str(e)}"
 
-def process_train_jsons():
+def json_to_mask_banded(json_path, output_dir, memory_budget=MEMORY_BUDGET):
+    """
+    Versão em faixas de json_to_mask para imagens muito grandes: rasteriza os polígonos
+    faixa a faixa e grava a máscara de classes (.npy uint8) e a mesma máscara colorida
+    PNG de forma incremental, sem nenhum buffer do tamanho da imagem.
+
+    O pico de memória (RSS) é o piso do processo (interpretador + numpy/cv2/PIL e o JSON
+    carregado, imageData incluso) mais ~memory_budget. Medido em 8000x6000, piso de ~54 MB:
+    pico de ~66 MB com memory_budget=8e6 e ~56 MB com 1e6 (json_to_mask: ~1.1 GB).
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        img_height = data['imageHeight']
+        img_width = data['imageWidth']
+        base_name = os.path.splitext(os.path.basename(json_path))[0]
+        
+        # Polígonos com índice de classe e bounding box vertical (para pular faixas)
+        polygons = []
+        for shape in data['shapes']:
+            if shape['shape_type'] == 'polygon':
+                _, class_name = get_shape_class(json_path, shape['label'])
+                points = np.array([(int(p[0]), int(p[1])) for p in shape['points']], dtype=np.int64)
+                polygons.append((CLASS_IDS[class_name], points, points[:, 1].min(), points[:, 1].max()))
+        del data
+        
+        # Cores como json_to_mask grava via cv2.imwrite (canais invertidos no arquivo PNG)
+        palette = np.zeros((256, 3), dtype=np.uint8)
+        palette[CLASS_IDS['gato']] = CLASS_COLORS['cat'][::-1]
+        palette[CLASS_IDS['cachorro']] = CLASS_COLORS['dog'][::-1]
+        counts = np.zeros(256, dtype=np.int64)
+        
+        class_path = os.path.join(output_dir, f"{base_name}_mask.npy")
+        mask_path = os.path.join(output_dir, f"{base_name}_mask.png")
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.uint8)), 'fortran_order': False,
+                  'shape': (img_height, img_width)}
+        
+        # Por pixel da faixa: classe (PIL) + RGB da paleta + scanline do PNG + folga do zlib
+        rows = band_rows(img_width, 8, memory_budget)
+        with open(class_path, 'wb') as class_file, PngBandWriter(mask_path, img_width, img_height) as png:
+            np.lib.format.write_array_header_1_0(class_file, header)
+            for y0, y1 in iter_bands(img_height, rows):
+                band = Image.new('L', (img_width, y1 - y0), 0)
+                draw = ImageDraw.Draw(band)
+                for class_id, points, top, bottom in polygons:
+                    if bottom < y0 or top >= y1:
+                        continue
+                    shifted = points - np.array([0, y0])
+                    draw.polygon([tuple(p) for p in shifted.tolist()], fill=class_id)
+                band_np = np.asarray(band)
+                class_file.write(band_np)
+                png.write(palette[band_np])
+                counts += np.bincount(band_np.ravel(), minlength=256)
+        
+        colors_found = [name for name, count in zip(["fundo", "gato", "cachorro"], counts) if count > 0]
+        
+        return True, f"Máscara salva: {mask_path} (classes: {', '.join(colors_found)})"
+        
+    except Exception as e:
+        return False, f"Erro ao processar {json_path}: {str(e)}"
+
+def json_to_mask_cached(json_path, output_dir, memory_budget=None, cache=None):
+    """
+    json_to_mask (ou a versão em faixas) pelo cache de artefatos: JSON idêntico com os
+    mesmos parâmetros nunca é rasterizado de novo, a saída vira um link para o cache.
+    Retorna (sucesso, mensagem, veio_do_cache)
+    """
+    cache = cache or get_cache()
+    # A classe vem do nome do arquivo, então o nome também faz parte da chave
+    params = {'version': MASK_VERSION, 'name': os.path.basename(json_path),
+              'colors': CLASS_COLORS, 'banded': bool(memory_budget)}
+
+    def producer(staging_dir):
+        if memory_budget:
+            success, message = json_to_mask_banded(json_path, staging_dir, memory_budget)
+        else:
+            success, message = json_to_mask(json_path, staging_dir)
+        if not success:
+            raise RuntimeError(message)
+
+    try:
+        files, hit = cache.produce('labelme_mask', [json_path], params, producer)
+    except RuntimeError as e:
+        return False, str(e), False
+
+    for name, cached_path in files.items():
+        cache.materialize(cached_path, os.path.join(output_dir, name))
+    base_name = os.path.splitext(os.path.basename(json_path))[0]
+    return True, f"Máscara salva: {os.path.join(output_dir, f'{base_name}_mask.png')}", hit
+
+def process_train_jsons(memory_budget=None):
     """
     Processa todos os arquivos JSON na pasta train/
+    (com memory_budget, usa o modo em faixas para imagens grandes)
     """
     train_dir = "train"
     masks_dir = "masks"
@@ -98,17 +197,20 @@ def process_train_jsons():
     os.makedirs(masks_dir, exist_ok=True)
     
     # Listar todos os arquivos JSON
-    json_files = [f for f in os.listdir(train_dir) if f.endswith('.json')]
+    json_files = get_catalog().listdir(train_dir, suffix='.json')
     
     print(f"Encontrados {len(json_files)} arquivos JSON para processar...")
     
     success_count = 0
     error_count = 0
+    cached_count = 0
+    cache = get_cache()
     
     # Processar cada arquivo JSON com barra de progresso
     for json_file in tqdm(json_files, desc="Convertendo JSONs para máscaras"):
         json_path = os.path.join(train_dir, json_file)
-        success, message = json_to_mask(json_path, masks_dir)
+        success, message, hit = json_to_mask_cached(json_path, masks_dir, memory_budget, cache)
+        cached_count += hit
         
         if success:
             success_count += 1
@@ -119,18 +221,23 @@ def process_train_jsons():
     print(f"\nProcessamento concluído!")
     print(f"✅ Sucessos: {success_count}")
     print(f"❌ Erros: {error_count}")
+    print(f"♻️  Reaproveitadas do cache: {cached_count}")
     print(f"📁 Máscaras salvas em: {masks_dir}/")
+    cache.save()
 
 def verify_masks():
     """
     Verifica as máscaras coloridas geradas
     """
     masks_dir = "masks"
-    if not os.path.exists(masks_dir):
+    catalog = get_catalog()
+    # Máscaras acabaram de ser geradas: revalidar a pasta
+    catalog.refresh(masks_dir)
+    if not catalog.exists(masks_dir):
         print("Diretório de máscaras não encontrado!")
         return
     
-    mask_files = [f for f in os.listdir(masks_dir) if f.endswith('_mask.png')]
+    mask_files = catalog.listdir(masks_dir, suffix='_mask.png')
     print("\n📊 Estatísticas das máscaras:")
     print(f"Total de máscaras: {len(mask_files)}")
     
@@ -156,3 +263,4 @@ if __name__ == "__main__":
     print("🔄 Convertendo anotações LabelMe para máscaras...")
     process_train_jsons()
     verify_masks()
+    get_catalog().save()
@@ -0,0 +1,139 @@
+import os
+import json
+import numpy as np
+import cv2
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from file_catalog import get_catalog
+
+LABELME_VERSION = "5.2.1"
+# Índice em masks_npy -> label usado nas anotações (o mesmo que json_to_mask reconhece)
+CLASS_LABELS = {1: 'cat', 2: 'dog'}
+
+DEFAULT_TOLERANCE = 1.5  # Erro máximo (px) do Douglas-Peucker
+DEFAULT_MIN_AREA = 100   # Regiões menores que isso (px²) são descartadas
+
+def mask_to_shapes(mask, tolerance=DEFAULT_TOLERANCE, min_area=DEFAULT_MIN_AREA, scale=(1.0, 1.0)):
+    """
+    Converte um mapa de classes em shapes de polígono do LabelMe (contornos externos
+    simplificados com Douglas-Peucker, coordenadas multiplicadas por scale=(sx, sy))
+    """
+    shapes = []
+    for class_id, label in CLASS_LABELS.items():
+        binary = (mask == class_id).astype(np.uint8)
+        if not binary.any():
+            continue
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            if cv2.contourArea(contour) < min_area:
+                continue
+            polygon = cv2.approxPolyDP(contour, tolerance, closed=True).reshape(-1, 2)
+            if len(polygon) < 3:
+                continue
+            points = np.round(polygon * np.array(scale), 1).tolist()
+            shapes.append({
+                'label': label,
+                'points': points,
+                'group_id': None,
+                'description': '',
+                'shape_type': 'polygon',
+                'flags': {},
+            })
+    return shapes
+
+def _export_one(task):
+    """
+    Worker: traça uma predição e grava o JSON do LabelMe (sem imageData)
+    """
+    base_name, pred_path, image_path, output_dir, tolerance, min_area = task
+
+    mask = np.load(pred_path)
+    with Image.open(image_path) as image:
+        width, height = image.size  # Só o cabeçalho é lido
+    # Predição em outra resolução: escala os vértices em vez de redimensionar a máscara
+    scale = (width / mask.shape[1], height / mask.shape[0])
+
+    shapes = mask_to_shapes(mask, tolerance, min_area, scale)
+    data = {
+        'version': LABELME_VERSION,
+        'flags': {},
+        'shapes': shapes,
+        'imagePath': os.path.relpath(image_path, output_dir),
+        'imageData': None,
+        'imageHeight': height,
+        'imageWidth': width,
+    }
+
+    json_path = os.path.join(output_dir, f"{base_name}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return len(shapes), sum(len(s['points']) for s in shapes), os.path.getsize(json_path)
+
+def export_predictions(image_dir, pred_dir, output_dir, tolerance=DEFAULT_TOLERANCE,
+                       min_area=DEFAULT_MIN_AREA, workers=None):
+    """
+    Exporta todas as predições (.npy) de uma pasta como JSONs do LabelMe em paralelo
+    """
+    print("✏️  Exportando predições para LabelMe...")
+    print("="*60)
+
+    catalog = get_catalog()
+    if not catalog.exists(pred_dir):
+        print(f"❌ Predições não encontradas: {pred_dir}")
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+
+    image_names = set(catalog.listdir(image_dir, suffix='.jpg'))
+    tasks = []
+    for file in catalog.listdir(pred_dir, suffix='.npy'):
+        base_name = file[:-4]
+        if f"{base_name}.jpg" not in image_names:
+            continue
+        tasks.append((base_name, os.path.join(pred_dir, file), os.path.join(image_dir, f"{base_name}.jpg"),
+                      output_dir, tolerance, min_area))
+    print(f"📊 {len(tasks)} predições com imagem correspondente")
+
+    shapes = vertices = total_bytes = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for n_shapes, n_vertices, size in tqdm(pool.map(_export_one, tasks, chunksize=16),
+                                               total=len(tasks), desc="Traçando polígonos"):
+            shapes += n_shapes
+            vertices += n_vertices
+            total_bytes += size
+    catalog.refresh(output_dir)
+
+    n = max(len(tasks), 1)
+    print(f"   🔷 Polígonos: {shapes} ({shapes / n:.1f} por imagem, {vertices / max(shapes, 1):.1f} vértices em média)")
+    print(f"   💾 {total_bytes / n / 1024:.1f} KB por JSON em {output_dir}/")
+    return {'files': len(tasks), 'shapes': shapes, 'vertices': vertices, 'bytes': total_bytes}
+
+def prelabel_unannotated(model_path=None, tolerance=DEFAULT_TOLERANCE, min_area=DEFAULT_MIN_AREA):
+    """
+    Pré-anotação da pasta unannotated: inferência em tiles (se ainda não houver
+    predições) e exportação para LabelMe, para correção humana
+    """
+    from tiled_inference import MODEL_PATH, load_model, predict_tiled
+
+    image_dir = "dataset_final/unannotated"
+    pred_dir = "dataset_final/unannotated_predictions_npy"
+    output_dir = "dataset_final/unannotated_labelme"
+    catalog = get_catalog()
+
+    if not catalog.exists(pred_dir):
+        model_path = model_path or MODEL_PATH
+        if not os.path.exists(model_path):
+            print(f"❌ Modelo não encontrado: {model_path}")
+            return None
+        print("🧩 Gerando predições em tiles para as imagens não anotadas...")
+        image_paths = [os.path.join(image_dir, f) for f in catalog.listdir(image_dir, suffix='.jpg')]
+        predict_tiled(load_model(model_path), image_paths, pred_dir)
+        # Revalida pred_dir e dataset_final/ (onde ela acabou de ser criada): sem isso,
+        # export_predictions veria a pasta como inexistente
+        catalog.refresh(pred_dir)
+
+    return export_predictions(image_dir, pred_dir, output_dir, tolerance, min_area)
+
+if __name__ == "__main__":
+    prelabel_unannotated()
+    get_catalog().save()
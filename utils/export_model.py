@@ -0,0 +1,217 @@
+import os
+import time
+import numpy as np
+import torch
+
+from tiled_inference import load_model, preprocess_tiles, MODEL_PATH, TILE_SIZE, NUM_CLASSES
+from batch_augmentation import load_split_arrays
+from postprocess_masks import confusion_matrix, iou_from_confusion
+
+EXPORT_DIR = "results/export"
+
+def export_torchscript(model, output_path, size=TILE_SIZE):
+    """
+    Exporta o modelo para TorchScript via tracing (o batch continua dinâmico)
+    """
+    example = torch.zeros(2, 3, size, size)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    traced = torch.jit.freeze(traced.eval())
+    traced.save(output_path)
+    return traced
+
+def export_onnx(model, output_path, size=TILE_SIZE, opset=17):
+    """
+    Exporta o modelo para ONNX com eixo de batch dinâmico
+    """
+    example = torch.zeros(1, 3, size, size)
+    torch.onnx.export(
+        model, example, output_path,
+        input_names=['input'], output_names=['logits'],
+        dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+        opset_version=opset, dynamo=False,
+    )
+    return output_path
+
+def quantize_dynamic_int8(model):
+    """
+    Quantização dinâmica int8 (pesos de Linear/LSTM; convoluções permanecem em fp32).
+    Retorna None se o modelo não tiver nenhuma dessas camadas (ex.: U-Net só convolucional):
+    o resultado seria o próprio fp32 com outro nome.
+    """
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+    if not any(type(m).__module__.startswith('torch.ao.nn.quantized') for m in quantized.modules()):
+        return None
+    return quantized
+
+def quantize_static_int8(model, calibration_images, batch_size=16, backend='x86'):
+    """
+    Quantização estática int8 (FX) calibrada com imagens do split de validação
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    torch.backends.quantized.engine = backend
+    example = (preprocess_tiles(calibration_images[:1]),)
+    prepared = prepare_fx(model, get_default_qconfig_mapping(backend), example)
+
+    with torch.no_grad():
+        for start in range(0, len(calibration_images), batch_size):
+            prepared(preprocess_tiles(calibration_images[start:start + batch_size]))
+
+    return convert_fx(prepared)
+
+def _onnx_runner(onnx_path, threads=None):
+    """
+    Cria função de inferência via onnxruntime (se instalado). O número de threads do ORT
+    é fixado na criação da sessão (torch.set_num_threads não o afeta)
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    options = ort.SessionOptions()
+    if threads is not None:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+    return lambda inputs: torch.from_numpy(session.run(None, {'input': inputs.numpy()})[0])
+
+def predict_classes(run, images, batch_size=32):
+    """
+    Predições (N, H, W) de classe para um array de imagens uint8
+    """
+    preds = []
+    with torch.no_grad():
+        for start in range(0, len(images), batch_size):
+            logits = run(preprocess_tiles(images[start:start + batch_size]))
+            preds.append(logits.argmax(dim=1).numpy())
+    return np.concatenate(preds)
+
+def mean_iou(pred, target):
+    """
+    mIoU (média das classes presentes) com a mesma matriz de confusão do pós-processamento
+    """
+    return np.nanmean(iou_from_confusion(confusion_matrix(pred, target, NUM_CLASSES)))
+
+def parity_check(runners, images, masks):
+    """
+    Compara cada variante com o fp32: mIoU contra o ground truth e concordância com o fp32
+    """
+    print("\n🎯 Paridade (split de teste):")
+    reference = predict_classes(runners['fp32'], images)
+    reference_miou = mean_iou(reference, masks)
+
+    results = {}
+    for name, run in runners.items():
+        preds = reference if name == 'fp32' else predict_classes(run, images)
+        miou = mean_iou(preds, masks)
+        agreement = mean_iou(preds, reference)
+        results[name] = {'miou': miou, 'drift': miou - reference_miou, 'agreement_iou': agreement}
+        print(f"   {name:>12}: mIoU {miou:.4f} (Δ {miou - reference_miou:+.4f}) | concordância com fp32 {agreement:.4f}")
+    return results
+
+def benchmark_runtimes(runners, images, batch_sizes=(1, 32), thread_counts=None, n_iters=10,
+                       runner_factories=None):
+    """
+    Latência (ms/batch) e throughput (imagens/s) por variante, tamanho de batch e número de threads.
+    runner_factories: {nome: f(threads)} para runtimes fora do torch (ex.: ONNX), recriados a
+    cada número de threads; os demais runners seguem torch.set_num_threads
+    """
+    runner_factories = runner_factories or {}
+    if thread_counts is None:
+        max_threads = os.cpu_count() or 1
+        thread_counts = sorted({1, 2, 4, max_threads} & set(range(1, max_threads + 1)))
+
+    print("\n⏱️  Benchmark de runtime:")
+    original_threads = torch.get_num_threads()
+    results = []
+
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        thread_runners = {name: runner_factories[name](threads) if name in runner_factories else run
+                          for name, run in runners.items()}
+        for batch_size in batch_sizes:
+            inputs = preprocess_tiles(images[np.arange(batch_size) % len(images)])
+            for name, run in thread_runners.items():
+                with torch.no_grad():
+                    run(inputs)  # aquecimento
+                    start = time.perf_counter()
+                    for _ in range(n_iters):
+                        run(inputs)
+                latency = (time.perf_counter() - start) / n_iters
+                results.append({'runtime': name, 'threads': threads, 'batch_size': batch_size,
+                                'latency_ms': latency * 1000, 'images_per_s': batch_size / latency})
+                print(f"   {name:>12} | threads={threads:<2} batch={batch_size:<3} | "
+                      f"{latency * 1000:8.2f} ms | {batch_size / latency:8.1f} img/s")
+
+    torch.set_num_threads(original_threads)
+    return results
+
+def export_all(model_path=MODEL_PATH, output_dir=EXPORT_DIR, quantization='static', eager_model_path=None):
+    """
+    Exporta TorchScript/ONNX, quantiza (opcional) e roda paridade + benchmark.
+
+    A quantização estática (FX) precisa do nn.Module eager: se model_path for TorchScript,
+    passe eager_model_path (torch.save(model)) ou use quantization='dynamic'/None.
+    Falhas da quantização pedida interrompem a exportação em vez de sumir do relatório.
+    """
+    print("📦 Exportando modelo de segmentação...")
+    print("="*60)
+
+    if not os.path.exists(model_path):
+        print(f"❌ Modelo não encontrado: {model_path}")
+        return None
+
+    model = load_model(model_path)
+    eager_model = None
+    if quantization == 'static':
+        # Conferido antes de exportar qualquer coisa: sem modelo eager não há int8 estático
+        if eager_model_path:
+            eager_model = load_model(eager_model_path, eager=True)
+        elif isinstance(model, torch.jit.ScriptModule):
+            raise ValueError(f"Quantização estática precisa do modelo eager, mas {model_path} é TorchScript: "
+                             f"passe eager_model_path (torch.save(model)) ou quantization='dynamic'/None")
+        else:
+            eager_model = model
+
+    os.makedirs(output_dir, exist_ok=True)
+    runners = {'fp32': model}
+    runner_factories = {}
+
+    scripted = export_torchscript(model, os.path.join(output_dir, "model_fp32.ts"))
+    runners['torchscript'] = scripted
+    print(f"   ✅ TorchScript: {output_dir}/model_fp32.ts")
+
+    onnx_path = os.path.join(output_dir, "model_fp32.onnx")
+    try:
+        export_onnx(model, onnx_path)
+        print(f"   ✅ ONNX: {onnx_path}")
+        onnx_run = _onnx_runner(onnx_path)
+        if onnx_run is not None:
+            runners['onnx'] = onnx_run
+            runner_factories['onnx'] = lambda threads: _onnx_runner(onnx_path, threads)
+        else:
+            print("   ⚠️  onnxruntime não instalado: ONNX fora do benchmark")
+    except Exception as e:
+        print(f"   ⚠️  Falha ao exportar ONNX: {e}")
+
+    if quantization == 'dynamic':
+        quantized = quantize_dynamic_int8(model)
+        if quantized is None:
+            print("   ⚠️  Quantização dinâmica não quantizou nenhuma camada (sem Linear/LSTM): variante ignorada")
+        else:
+            runners['int8_dynamic'] = quantized
+    elif quantization == 'static':
+        val_images, _ = load_split_arrays('val')
+        quantized = quantize_static_int8(eager_model, val_images)
+        runners['int8_static'] = export_torchscript(quantized, os.path.join(output_dir, "model_int8.ts"))
+        print(f"   ✅ TorchScript int8: {output_dir}/model_int8.ts")
+
+    test_images, test_masks = load_split_arrays('test')
+    parity = parity_check(runners, test_images, test_masks)
+    bench = benchmark_runtimes(runners, test_images, runner_factories=runner_factories)
+    return {'parity': parity, 'benchmark': bench}
+
+if __name__ == "__main__":
+    export_all()
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+
+DEFAULT_INDEX_PATH = ".file_catalog.json"
+INDEX_VERSION = 1
+
+# Listagens feitas a menos de 2s da última alteração da pasta podem ter perdido
+# arquivos criados no mesmo "tick" do mtime (sistemas de arquivos de rede/FAT)
+RACY_WINDOW_NS = 2_000_000_000
+
+class FileCatalog:
+    """
+    Índice de diretórios: um único os.scandir por pasta.
+
+    Uma pasta só é relida quando seu mtime muda (arquivo criado/removido/renomeado),
+    e a validação do mtime acontece no máximo uma vez por sessão (até refresh()).
+    É um cache de listagens apenas: tamanho/mtime de arquivos reescritos in-place
+    não são acompanhados (stat() consulta o disco).
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self._dirs = {}
+        self._validated = set()
+        self.scans = 0
+
+        if index_path and os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self._dirs = data['dirs']
+            except (OSError, ValueError):
+                self._dirs = {}
+
+    def _entries(self, directory):
+        """
+        Entradas de uma pasta ({nome: [é_pasta, tamanho, mtime_ns]}) ou None se não existir
+        """
+        key = os.path.abspath(directory)
+        if key in self._validated:
+            cached = self._dirs.get(key)
+            return cached['entries'] if cached else None
+
+        self._validated.add(key)
+        try:
+            dir_mtime = os.stat(key).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            self._dirs.pop(key, None)
+            return None
+
+        cached = self._dirs.get(key)
+        if (cached and cached['mtime_ns'] == dir_mtime
+                and cached['scanned_ns'] - dir_mtime > RACY_WINDOW_NS):
+            return cached['entries']
+
+        entries = {}
+        with os.scandir(key) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.name] = [entry.is_dir(), st.st_size, st.st_mtime_ns]
+
+        self._dirs[key] = {'mtime_ns': dir_mtime, 'scanned_ns': time.time_ns(), 'entries': entries}
+        self.scans += 1
+        return entries
+
+    def listdir(self, directory, suffix=None, prefix=None):
+        """
+        Equivalente a os.listdir (ordenado), com filtros opcionais de sufixo/prefixo
+        """
+        entries = self._entries(directory)
+        if entries is None:
+            raise FileNotFoundError(f"Diretório não encontrado: {directory}")
+        return sorted(name for name in entries
+                      if (suffix is None or name.endswith(suffix))
+                      and (prefix is None or name.startswith(prefix)))
+
+    def count(self, directory, suffix=None, prefix=None):
+        return len(self.listdir(directory, suffix=suffix, prefix=prefix))
+
+    def exists(self, path):
+        """
+        Equivalente a os.path.exists, respondido pela listagem da pasta-mãe
+        """
+        path = os.path.abspath(path)
+        parent, name = os.path.split(path)
+        if not name:
+            return os.path.exists(path)
+        entries = self._entries(parent)
+        return entries is not None and name in entries
+
+    def isdir(self, path):
+        parent, name = os.path.split(os.path.abspath(path))
+        entries = self._entries(parent)
+        return entries is not None and name in entries and entries[name][0]
+
+    def stat(self, path):
+        """
+        (tamanho, mtime_ns) atuais do arquivo, ou None se não existir.
+
+        Sempre faz os.stat: reescrever um arquivo in-place não muda o mtime da pasta,
+        então os valores guardados na listagem não servem para decidir se algo mudou
+        """
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def walk(self, directory):
+        """
+        Percorre a árvore a partir do catálogo, gerando (pasta, [arquivos])
+        """
+        names = self.listdir(directory)
+        files = [n for n in names if not self.isdir(os.path.join(directory, n))]
+        yield directory, files
+        for name in names:
+            path = os.path.join(directory, name)
+            if self.isdir(path):
+                yield from self.walk(path)
+
+    def refresh(self, directory=None):
+        """
+        Força nova validação (por mtime) de uma pasta ou de todas na próxima consulta.
+        A pasta-mãe também é revalidada: exists()/isdir() da própria pasta vêm da listagem dela
+        """
+        if directory is None:
+            self._validated.clear()
+        else:
+            directory = os.path.abspath(directory)
+            self._validated.discard(directory)
+            self._validated.discard(os.path.dirname(directory))
+
+    def save(self, index_path=None):
+        """
+        Persiste o índice em JSON para ser reaproveitado pelas próximas execuções
+        """
+        index_path = index_path or self.index_path
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'dirs': self._dirs}, f)
+        os.replace(tmp_path, index_path)
+
+_catalog = None
+
+def get_catalog(index_path=DEFAULT_INDEX_PATH):
+    """
+    Catálogo compartilhado pelos scripts (carregado do disco na primeira chamada)
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = FileCatalog(index_path)
+    return _catalog
+
+if __name__ == "__main__":
+    catalog = get_catalog()
+    start = time.perf_counter()
+    print("🗂️  Indexando pastas do projeto...")
+    for folder in ["train", "masks", "output", "test1", "dataset_final"]:
+        if not catalog.isdir(folder):
+            continue
+        for directory, files in catalog.walk(folder):
+            print(f"   📁 {directory}: {len(files)} arquivos")
+    catalog.save()
+    print(f"✅ Índice salvo em {catalog.index_path} ({catalog.scans} pastas lidas "
+          f"em {(time.perf_counter() - start) * 1000:.1f} ms)")
@@ -0,0 +1,187 @@
+import os
+import csv
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from file_catalog import get_catalog
+
+# Limites para os alertas
+MIN_AREA = 100.0          # Área mínima (px²) para não ser considerado "pequeno"
+MIN_VERTICES = 3
+MAX_TRUNCATION_SHARE = 0.05  # Fração máxima da área deslocada pelo int() do conversor
+MAX_PAIRS_PER_CHUNK = 4_000_000  # Pares de arestas avaliados por vez no teste de auto-interseção
+
+# Gravidade de cada alerta (usada para ordenar o relatório)
+SEVERITY = {
+    'invalido': 5,
+    'auto_intersecao': 4,
+    'classe_divergente': 4,
+    'fora_da_imagem': 3,
+    'pequeno': 2,
+    'truncamento': 1,
+}
+
+def class_from_text(text):
+    """
+    Classe ('gato'/'cachorro') a partir de um nome de arquivo ou label, ou None
+    """
+    text = text.lower()
+    if 'cat' in text or 'gato' in text:
+        return 'gato'
+    if 'dog' in text or 'cachorro' in text:
+        return 'cachorro'
+    return None
+
+def polygon_area(points):
+    """
+    Área pela fórmula do laço (shoelace), vetorizada
+    """
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def polygon_perimeter(points):
+    return float(np.linalg.norm(np.roll(points, -1, axis=0) - points, axis=1).sum())
+
+def count_self_intersections(points):
+    """
+    Conta pares de arestas não adjacentes que se cruzam (teste de orientação em broadcast)
+    """
+    n = len(points)
+    if n < 4:
+        return 0
+
+    a = points
+    b = np.roll(points, -1, axis=0)
+    d = b - a
+    cross = lambda u, v: u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+    total = 0
+    rows_per_chunk = max(1, MAX_PAIRS_PER_CHUNK // n)
+    j = np.arange(n)
+    for start in range(0, n, rows_per_chunk):
+        i = np.arange(start, min(start + rows_per_chunk, n))[:, None]
+
+        # Orientação dos extremos de j em relação à aresta i, e vice-versa
+        o1 = cross(d[i], a[j] - a[i])
+        o2 = cross(d[i], b[j] - a[i])
+        o3 = cross(d[j], a[i] - a[j])
+        o4 = cross(d[j], b[i] - a[j])
+        crosses = (o1 * o2 < 0) & (o3 * o4 < 0)
+
+        # Cada par uma vez (j > i + 1) e sem a primeira/última aresta, que são vizinhas
+        valid = (j > i + 1) & ~((i == 0) & (j == n - 1))
+        total += int(np.count_nonzero(crosses & valid))
+    return total
+
+def lint_file(json_path):
+    """
+    Worker: analisa todas as shapes de um JSON do LabelMe e devolve uma linha por shape
+    """
+    filename = os.path.basename(json_path)
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return [{'arquivo': filename, 'shape': -1, 'label': '', 'alertas': 'invalido',
+                 'gravidade': SEVERITY['invalido'], 'detalhe': str(e)}]
+
+    width, height = data.get('imageWidth', 0), data.get('imageHeight', 0)
+    file_class = class_from_text(filename)
+    rows = []
+
+    for index, shape in enumerate(data.get('shapes', [])):
+        if shape.get('shape_type', 'polygon') != 'polygon':
+            continue
+
+        label = shape.get('label', '')
+        points = np.asarray(shape.get('points', []), dtype=np.float64).reshape(-1, 2)
+        alerts = []
+
+        vertices = len(points)
+        area = polygon_area(points) if vertices >= MIN_VERTICES else 0.0
+        perimeter = polygon_perimeter(points) if vertices >= 2 else 0.0
+        # O conversor trunca coordenadas com int(): a borda anda em média `shift` pixels,
+        # então perímetro * shift / área estima a fração de pixels que muda de lugar
+        shift = float(np.linalg.norm(points - np.trunc(points), axis=1).mean()) if vertices else 0.0
+        truncation_share = perimeter * shift / area if area else 0.0
+        outside = int(np.count_nonzero((points[:, 0] < 0) | (points[:, 0] > width) |
+                                       (points[:, 1] < 0) | (points[:, 1] > height)))
+        intersections = count_self_intersections(points)
+        label_class = class_from_text(label)
+
+        if vertices < MIN_VERTICES or area == 0:
+            alerts.append('invalido')
+        if intersections:
+            alerts.append('auto_intersecao')
+        if file_class and label_class and file_class != label_class:
+            alerts.append('classe_divergente')
+        if outside:
+            alerts.append('fora_da_imagem')
+        if 0 < area < MIN_AREA:
+            alerts.append('pequeno')
+        if truncation_share > MAX_TRUNCATION_SHARE:
+            alerts.append('truncamento')
+
+        rows.append({
+            'arquivo': filename,
+            'shape': index,
+            'label': label,
+            'classe_arquivo': file_class or '',
+            'classe_label': label_class or '',
+            'vertices': vertices,
+            'area': round(area, 2),
+            'perimetro': round(perimeter, 2),
+            'fracao_truncamento': round(truncation_share, 4),
+            'pontos_fora': outside,
+            'auto_intersecoes': intersections,
+            'alertas': ';'.join(alerts),
+            'gravidade': max((SEVERITY[a] for a in alerts), default=0),
+        })
+
+    if not rows:
+        rows.append({'arquivo': filename, 'shape': -1, 'label': '', 'alertas': 'invalido',
+                     'gravidade': SEVERITY['invalido'], 'detalhe': 'nenhum polígono'})
+    return rows
+
+def lint_annotations(json_dir='train', report_path='annotation_report.csv', workers=None):
+    """
+    Audita todos os JSONs do LabelMe em paralelo e grava relatório CSV ordenado por gravidade
+    """
+    print("🔎 Auditando anotações LabelMe...")
+    print("="*60)
+
+    catalog = get_catalog()
+    json_paths = [os.path.join(json_dir, f) for f in catalog.listdir(json_dir, suffix='.json')]
+    print(f"📊 {len(json_paths)} arquivos JSON em {json_dir}/")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_rows in tqdm(pool.map(lint_file, json_paths, chunksize=32), total=len(json_paths),
+                              desc="Analisando polígonos"):
+            rows.extend(file_rows)
+
+    rows.sort(key=lambda r: (-r['gravidade'], r['arquivo'], r['shape']))
+
+    fieldnames = ['gravidade', 'alertas', 'arquivo', 'shape', 'label', 'classe_arquivo', 'classe_label',
+                  'vertices', 'area', 'perimetro', 'fracao_truncamento', 'pontos_fora',
+                  'auto_intersecoes', 'detalhe']
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    counts = {}
+    for row in rows:
+        for alert in filter(None, row['alertas'].split(';')):
+            counts[alert] = counts.get(alert, 0) + 1
+
+    print(f"\n📝 Shapes analisadas: {len(rows)}")
+    for alert in sorted(SEVERITY, key=SEVERITY.get, reverse=True):
+        icon = '⚠️ ' if counts.get(alert) else '✅'
+        print(f"   {icon} {alert}: {counts.get(alert, 0)}")
+    print(f"💾 Relatório salvo em: {report_path}")
+    return rows
+
+if __name__ == "__main__":
+    lint_annotations()
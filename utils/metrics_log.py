@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import numpy as np
+
+# Cada métrica é um arquivo binário append-only de registros (step, valor)
+RECORD_DTYPE = np.dtype([('step', '<i8'), ('value', '<f8')])
+METRIC_EXT = '.bin'
+
+def _metric_path(run_dir, name):
+    """
+    Caminho do arquivo de uma métrica (nomes restritos a caracteres seguros)
+    """
+    if not re.fullmatch(r'[A-Za-z0-9_.\-]+', name):
+        raise ValueError(f"Nome de métrica inválido: {name!r}")
+    return os.path.join(run_dir, f"{name}{METRIC_EXT}")
+
+def load_class_names(path='dataset_final/class_names.txt'):
+    """
+    Lê a lista de classes (uma por linha)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+class MetricsWriter:
+    """
+    Escritor com buffer: acumula registros em memória e faz append em lote no disco
+    """
+
+    def __init__(self, run_dir, buffer_size=4096, meta=None):
+        self.run_dir = run_dir
+        self.buffer_size = buffer_size
+        self._buffers = {}
+        self._pending = 0
+        os.makedirs(run_dir, exist_ok=True)
+
+        if meta is not None:
+            with open(os.path.join(run_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    def log(self, step, **metrics):
+        """
+        Registra um ou mais valores escalares no mesmo step
+        """
+        for name, value in metrics.items():
+            self._buffers.setdefault(name, []).append((int(step), float(value)))
+        self._pending += len(metrics)
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def log_per_class(self, step, prefix, values, class_names):
+        """
+        Registra uma série por classe (ex.: val_iou.Gato, val_iou.Cachorro)
+        """
+        self.log(step, **{f"{prefix}.{name}": value for name, value in zip(class_names, values)})
+
+    def flush(self):
+        """
+        Grava os buffers pendentes (um único write por métrica)
+        """
+        for name, records in self._buffers.items():
+            if not records:
+                continue
+            data = np.array(records, dtype=RECORD_DTYPE)
+            with open(_metric_path(self.run_dir, name), 'ab') as f:
+                # Registro parcial de uma escrita interrompida: descartar antes do append,
+                # senão todos os registros seguintes ficariam desalinhados
+                size = f.seek(0, os.SEEK_END)
+                partial = size % RECORD_DTYPE.itemsize
+                if partial:
+                    f.truncate(size - partial)
+                f.write(data.tobytes())
+            records.clear()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def list_metrics(run_dir):
+    """
+    Lista as métricas disponíveis em uma execução
+    """
+    return sorted(f[:-len(METRIC_EXT)] for f in os.listdir(run_dir) if f.endswith(METRIC_EXT))
+
+def open_metric(run_dir, name):
+    """
+    Abre a série de uma métrica via memmap (nada é carregado até ser acessado)
+    """
+    path = _metric_path(run_dir, name)
+    n_records = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if n_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    # Ignora um possível registro parcial no fim (escrita interrompida)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(n_records,))
+
+def read_metric(run_dir, name, start_step=None, stop_step=None, max_points=None, mode='minmax'):
+    """
+    Lê uma métrica, opcionalmente recortada por intervalo de steps e reduzida a max_points.
+
+    mode='stride' lê apenas um a cada k registros; 'mean' faz a média por bloco;
+    'minmax' mantém o mínimo e o máximo de cada bloco (preserva picos nos gráficos).
+    Retorna (steps, values).
+    """
+    records = open_metric(run_dir, name)
+    steps = records['step']
+
+    # Steps são crescentes: o recorte é feito por busca binária, sem varrer a série
+    lo = 0 if start_step is None else int(np.searchsorted(steps, start_step, side='left'))
+    hi = len(records) if stop_step is None else int(np.searchsorted(steps, stop_step, side='left'))
+    records = records[lo:hi]
+    n = len(records)
+
+    if max_points is None or n <= max_points:
+        return np.array(records['step']), np.array(records['value'])
+
+    if mode == 'stride':
+        k = -(-n // max_points)
+        chunk = records[::k]
+        return np.array(chunk['step']), np.array(chunk['value'])
+
+    # minmax gera 2 pontos por bloco; max_points=1 ainda precisa de ao menos um bloco
+    buckets = max(1, max_points // 2 if mode == 'minmax' else max_points)
+    k = -(-n // buckets)
+    if mode not in ('mean', 'minmax'):
+        raise ValueError(f"Modo de redução desconhecido: {mode}")
+
+    # Blocos completos de k registros + o bloco parcial do fim, reduzido do mesmo jeito
+    # (não só o último ponto: um pico ali não pode sumir)
+    usable = (n // k) * k
+    parts = [(records[:usable], k)] if usable else []
+    if usable < n:
+        parts.append((records[usable:], n - usable))
+
+    out_steps, out_values = [], []
+    for part, size in parts:
+        values = np.asarray(part['value']).reshape(-1, size)
+        bucket_steps = np.asarray(part['step']).reshape(-1, size)
+        if mode == 'mean':
+            out_steps.append(bucket_steps[:, size // 2])
+            out_values.append(values.mean(axis=1))
+        else:
+            rows = np.arange(len(values))
+            arg_min, arg_max = values.argmin(axis=1), values.argmax(axis=1)
+            first = np.minimum(arg_min, arg_max)
+            second = np.maximum(arg_min, arg_max)
+            out_steps.append(np.stack([bucket_steps[rows, first], bucket_steps[rows, second]], axis=1).ravel())
+            out_values.append(np.stack([values[rows, first], values[rows, second]], axis=1).ravel())
+    return np.concatenate(out_steps), np.concatenate(out_values)
+
+def import_history_json(history_path, run_dir):
+    """
+    Converte o history.json (um blob por época) para o formato append-only
+    """
+    with open(history_path, 'r', encoding='utf-8') as f:
+        history = json.load(f)
+
+    # Importação recria a execução do zero (evita duplicar registros)
+    for name in history:
+        path = _metric_path(run_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    with MetricsWriter(run_dir, meta={'source': history_path, 'step_unit': 'epoch'}) as writer:
+        n_epochs = max(len(v) for v in history.values())
+        for epoch in range(n_epochs):
+            writer.log(epoch + 1, **{k: v[epoch] for k, v in history.items() if epoch < len(v)})
+
+    print(f"✅ {n_epochs} épocas importadas de {history_path} para {run_dir}/")
+
+def plot_training_metrics(run_dir, output_path, max_points=2000):
+    """
+    Gera o gráfico de loss/accuracy (estilo training_metrics.png) lendo só os pontos necessários
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    available = set(list_metrics(run_dir))
+    panels = [('loss', 'Loss'), ('accuracy', 'Accuracy')]
+
+    fig, axes = plt.subplots(1, len(panels), figsize=(14, 5))
+    for ax, (metric, title) in zip(axes, panels):
+        for name, label in [(metric, 'Treino'), (f"val_{metric}", 'Validação')]:
+            if name in available:
+                steps, values = read_metric(run_dir, name, max_points=max_points)
+                ax.plot(steps, values, label=label)
+        ax.set_title(title)
+        ax.set_xlabel('Step')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✅ Gráfico salvo como '{output_path}'")
+
+if __name__ == "__main__":
+    run_dir = "results/metrics"
+    import_history_json("results/history.json", run_dir)
+
+    print("\n📊 Métricas disponíveis:")
+    for name in list_metrics(run_dir):
+        steps, values = read_metric(run_dir, name)
+        print(f"   {name}: {len(steps)} pontos (último = {values[-1]:.4f})")
+
+    plot_training_metrics(run_dir, "results/training_metrics_log.png")
@@ -2,6 +2,7 @@ import os
 import shutil
 import random
 from sklearn.model_selection import train_test_split
+from file_catalog import get_catalog
 
 def organize_dataset():
     """
@@ -12,16 +13,17 @@ def organize_dataset():
     # Listar todos os arquivos que têm tanto imagem quanto máscara
     train_dir = "train"
     masks_dir = "masks"
+    catalog = get_catalog()
     
     # Encontrar pares imagem-máscara válidos
     valid_pairs = []
     
-    for mask_file in os.listdir(masks_dir):
+    for mask_file in catalog.listdir(masks_dir):
         if mask_file.endswith('_mask.png'):
             base_name = mask_file.replace('_mask.png', '')
             img_file = base_name + '.jpg'
             
-            if os.path.exists(os.path.join(train_dir, img_file)):
+            if catalog.exists(os.path.join(train_dir, img_file)):
                 valid_pairs.append(base_name)
     
     print(f"✅ Encontrados {len(valid_pairs)} pares válidos de imagem-máscara")
@@ -87,9 +89,10 @@ def organize_dataset():
     
     # Verificar resultado final
     print("\n📋 Verificação final:")
+    catalog.refresh()
     for split in ['train', 'val', 'test']:
-        img_count = len(os.listdir(f"dataset/{split}/images"))
-        mask_count = len(os.listdir(f"dataset/{split}/masks"))
+        img_count = catalog.count(f"dataset/{split}/images")
+        mask_count = catalog.count(f"dataset/{split}/masks")
         print(f"   {split}: {img_count} imagens, {mask_count} máscaras")
 
 def create_dataset_info():
@@ -135,4 +138,5 @@ dataset/
 if __name__ == "__main__":
     organize_dataset()
     create_dataset_info()
+    get_catalog().save()
     print("\n🎉 Pronto! Seu dataset está organizado e pronto para treino!")
@@ -1,7 +1,8 @@
 import os
-import shutil
 import random
 from sklearn.model_selection import train_test_split
+from file_catalog import get_catalog
+from artifact_cache import get_cache
 
 def organize_complete_dataset():
     """
@@ -34,21 +35,22 @@ def organize_complete_dataset():
     print("🔍 Identificando arquivos válidos...")
     
     valid_files = []
+    catalog = get_catalog()
     
     # Verificar arquivos na pasta train/ que têm JSON
     train_dir = "train"
-    if os.path.exists(train_dir):
-        for file in os.listdir(train_dir):
+    if catalog.exists(train_dir):
+        for file in catalog.listdir(train_dir):
             if file.endswith('.json'):
                 base_name = file.replace('.json', '')
                 
-                # Verificar se existem todos os arquivos necessários
+                # Verificar se existem todos os arquivos necessários (consultas ao catálogo, sem stat)
                 img_path = os.path.join(train_dir, f"{base_name}.jpg")
                 mask_colored = f"masks/{base_name}_mask.png"
                 mask_class = f"output/SegmentationClass/{base_name}.png"
                 mask_npy = f"output/SegmentationClassNpy/{base_name}.npy"
                 
-                if all(os.path.exists(path) for path in [img_path, mask_colored, mask_class, mask_npy]):
+                if all(catalog.exists(path) for path in [img_path, mask_colored, mask_class, mask_npy]):
                     valid_files.append({
                         'base_name': base_name,
                         'image': img_path,
@@ -97,8 +99,10 @@ def organize_complete_dataset():
         dogs = len([f for f in files if f['class'] == 'dog'])
         print(f"   {split_name}: {len(files)} total (🐱{cats} + 🐶{dogs})")
     
-    # 4. Copiar arquivos para estrutura final
+    # 4. Copiar arquivos para estrutura final (links para o cache de artefatos:
+    # cada conteúdo distinto é copiado uma única vez, mesmo entre execuções)
     print("\n📁 Copiando arquivos...")
+    cache = get_cache()
     
     for split_name, files in splits.items():
         print(f"\n   Processando {split_name}...")
@@ -108,20 +112,24 @@ def organize_complete_dataset():
             
             # Copiar imagem
             dest_img = f"dataset_final/{split_name}/images/{base_name}.jpg"
-            shutil.copy2(file_info['image'], dest_img)
+            cache.materialize(cache.store_file(file_info['image']), dest_img)
             
             # Copiar máscara colorida
             dest_colored = f"dataset_final/{split_name}/masks_colored/{base_name}_mask.png"
-            shutil.copy2(file_info['mask_colored'], dest_colored)
+            cache.materialize(cache.store_file(file_info['mask_colored']), dest_colored)
             
             # Copiar máscara de classe
             dest_class = f"dataset_final/{split_name}/masks_class/{base_name}.png"
-            shutil.copy2(file_info['mask_class'], dest_class)
+            cache.materialize(cache.store_file(file_info['mask_class']), dest_class)
             
             # Copiar arquivo npy
             dest_npy = f"dataset_final/{split_name}/masks_npy/{base_name}.npy"
-            shutil.copy2(file_info['mask_npy'], dest_npy)
+            cache.materialize(cache.store_file(file_info['mask_npy']), dest_npy)
     
+    # Pastas de destino mudaram: revalidar na próxima consulta
+    catalog.refresh()
+    cache.save()
+    print(f"♻️  Cache: {cache.hits} reaproveitados, {cache.misses} novos")
     return splits
 
 def handle_test1_folder():
@@ -132,22 +140,26 @@ def handle_test1_folder():
     print("📁 Processando pasta test1...")
     
     test1_dir = "test1"
-    if not os.path.exists(test1_dir):
+    catalog = get_catalog()
+    if not catalog.exists(test1_dir):
         print("❌ Pasta test1 não encontrada")
         return
     
     # Criar pasta para imagens sem anotação
     os.makedirs("dataset_final/unannotated", exist_ok=True)
     
-    test1_files = [f for f in os.listdir(test1_dir) if f.endswith('.jpg')]
+    test1_files = catalog.listdir(test1_dir, suffix='.jpg')
     print(f"📊 Encontrados {len(test1_files)} arquivos em test1/")
     
-    # Copiar arquivos
+    # Copiar arquivos (links para o cache de artefatos)
+    cache = get_cache()
     for file in test1_files:
         src = os.path.join(test1_dir, file)
         dst = os.path.join("dataset_final/unannotated", file)
-        shutil.copy2(src, dst)
+        cache.materialize(cache.store_file(src), dst)
     
+    catalog.refresh()
+    cache.save()
     print(f"✅ {len(test1_files)} arquivos copiados para dataset_final/unannotated/")
 
 def create_dataset_info():
@@ -158,19 +170,20 @@ def create_dataset_info():
     print("📄 Criando documentação...")
     
     # Contar arquivos em cada split
+    catalog = get_catalog()
     splits_info = {}
     for split in ['train', 'val', 'test']:
         images_dir = f"dataset_final/{split}/images"
-        if os.path.exists(images_dir):
-            count = len(os.listdir(images_dir))
-            cat_count = len([f for f in os.listdir(images_dir) if f.startswith('cat')])
+        if catalog.exists(images_dir):
+            count = catalog.count(images_dir)
+            cat_count = catalog.count(images_dir, prefix='cat')
             dog_count = count - cat_count
             splits_info[split] = {'total': count, 'cats': cat_count, 'dogs': dog_count}
     
     # Contar arquivos não anotados
     unannotated_count = 0
-    if os.path.exists("dataset_final/unannotated"):
-        unannotated_count = len(os.listdir("dataset_final/unannotated"))
+    if catalog.exists("dataset_final/unannotated"):
+        unannotated_count = catalog.count("dataset_final/unannotated")
     
     info_content = f"""# Dataset de Segmentação - Cachorros e Gatos
 
@@ -277,13 +290,14 @@ def verify_final_dataset():
     print("\n" + "="*60)
     print("🔍 Verificando dataset final...")
     
+    catalog = get_catalog()
     for split in ['train', 'val', 'test']:
         base_path = f"dataset_final/{split}"
-        if os.path.exists(base_path):
-            img_count = len(os.listdir(f"{base_path}/images"))
-            colored_count = len(os.listdir(f"{base_path}/masks_colored"))
-            class_count = len(os.listdir(f"{base_path}/masks_class"))
-            npy_count = len(os.listdir(f"{base_path}/masks_npy"))
+        if catalog.exists(base_path):
+            img_count = catalog.count(f"{base_path}/images")
+            colored_count = catalog.count(f"{base_path}/masks_colored")
+            class_count = catalog.count(f"{base_path}/masks_class")
+            npy_count = catalog.count(f"{base_path}/masks_npy")
             
             print(f"\n{split.upper()}:")
             print(f"   📷 Imagens: {img_count}")
@@ -302,6 +316,7 @@ if __name__ == "__main__":
     handle_test1_folder()
     create_dataset_info()
     verify_final_dataset()
+    get_catalog().save()
     
     print("\n" + "="*60)
     print("🎉 DATASET FINAL ORGANIZADO COM SUCESSO!")
@@ -0,0 +1,200 @@
+import os
+import time
+import numpy as np
+import cv2
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from file_catalog import get_catalog
+
+NUM_CLASSES = 3  # Fundo, Gato, Cachorro
+
+# Etapas e parâmetros padrão do pós-processamento
+DEFAULT_OPTIONS = {
+    'min_area': 200,          # Componentes menores que isso viram fundo (0 desativa)
+    'fill_holes': True,       # Preenche buracos internos de cada classe
+    'max_hole_area': 5000,    # Buracos maiores que isso são mantidos (0 = sem limite)
+    'smooth_kernel': 5,       # Janela do filtro de maioria (0 desativa)
+    'guided_radius': 0,       # Raio do refinamento guiado pela imagem (0 desativa)
+    'guided_eps': 1e-3,
+}
+
+def remove_small_components(labels, min_area, num_classes=NUM_CLASSES):
+    """
+    Remove componentes conexos pequenos de cada classe (viram fundo)
+    """
+    out = labels.copy()
+    for class_id in range(1, num_classes):
+        binary = (labels == class_id).astype(np.uint8)
+        n, components, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        if n <= 1:
+            continue
+        # Tabela de consulta: componente -> remover? (o rótulo 0 é o fundo do binário)
+        remove = stats[:, cv2.CC_STAT_AREA] < min_area
+        remove[0] = False
+        out[remove[components]] = 0
+    return out
+
+def fill_holes(labels, max_hole_area=0, num_classes=NUM_CLASSES):
+    """
+    Preenche regiões cercadas por uma classe (componentes que não tocam a borda)
+    """
+    out = labels.copy()
+    for class_id in range(1, num_classes):
+        outside = (labels != class_id).astype(np.uint8)
+        n, components, stats, _ = cv2.connectedComponentsWithStats(outside, connectivity=4)
+        if n <= 1:
+            continue
+
+        touches_border = np.zeros(n, dtype=bool)
+        touches_border[np.concatenate([components[0], components[-1], components[:, 0], components[:, -1]])] = True
+
+        is_hole = ~touches_border
+        is_hole[0] = False
+        if max_hole_area:
+            is_hole &= stats[:, cv2.CC_STAT_AREA] <= max_hole_area
+        out[is_hole[components]] = class_id
+    return out
+
+def smooth_labels(labels, kernel, num_classes=NUM_CLASSES):
+    """
+    Suavização morfológica multiclasse: filtro de maioria (box filter por classe + argmax)
+    """
+    votes = np.stack([cv2.blur((labels == c).astype(np.float32), (kernel, kernel))
+                      for c in range(num_classes)])
+    return votes.argmax(axis=0).astype(labels.dtype)
+
+def guided_refine(labels, image, radius, eps, num_classes=NUM_CLASSES):
+    """
+    Refinamento rápido guiado pela imagem (guided filter sobre o one-hot, bordas seguem a imagem)
+    """
+    guide = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
+    ksize = (2 * radius + 1, 2 * radius + 1)
+    box = lambda x: cv2.boxFilter(x, -1, ksize)
+
+    mean_i = box(guide)
+    var_i = box(guide * guide) - mean_i * mean_i
+
+    refined = []
+    for c in range(num_classes):
+        p = (labels == c).astype(np.float32)
+        mean_p = box(p)
+        a = (box(guide * p) - mean_i * mean_p) / (var_i + eps)
+        b = mean_p - a * mean_i
+        refined.append(box(a) * guide + box(b))
+    return np.stack(refined).argmax(axis=0).astype(labels.dtype)
+
+def postprocess(labels, image=None, options=None):
+    """
+    Aplica as etapas habilitadas e retorna (máscara, tempo em ms por etapa)
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    timings = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    if options['min_area']:
+        labels = timed('componentes', remove_small_components, labels, options['min_area'])
+    if options['fill_holes']:
+        labels = timed('buracos', fill_holes, labels, options['max_hole_area'])
+    if options['smooth_kernel']:
+        labels = timed('suavização', smooth_labels, labels, options['smooth_kernel'])
+    if options['guided_radius'] and image is not None:
+        labels = timed('refinamento', guided_refine, labels, image, options['guided_radius'], options['guided_eps'])
+
+    return labels, timings
+
+def confusion_matrix(pred, target, num_classes=NUM_CLASSES):
+    """
+    Matriz de confusão (linhas = ground truth) via bincount
+    """
+    return np.bincount(target.ravel().astype(np.int64) * num_classes + pred.ravel().astype(np.int64),
+                       minlength=num_classes ** 2).reshape(num_classes, num_classes)
+
+def iou_from_confusion(confusion):
+    intersection = np.diag(confusion)
+    union = confusion.sum(axis=0) + confusion.sum(axis=1) - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1), np.nan)
+
+def _process_one(task):
+    """
+    Worker: pós-processa uma predição e devolve confusões antes/depois e tempos
+    """
+    base_name, pred_dir, split_dir, output_dir, options, has_gt = task
+
+    pred = np.load(os.path.join(pred_dir, f"{base_name}.npy"))
+    image = cv2.imread(os.path.join(split_dir, "images", f"{base_name}.jpg"))
+    if pred.shape != image.shape[:2]:
+        pred = cv2.resize(pred.astype(np.uint8), (image.shape[1], image.shape[0]),
+                          interpolation=cv2.INTER_NEAREST).astype(pred.dtype)
+
+    cleaned, timings = postprocess(pred, image, options)
+    np.save(os.path.join(output_dir, f"{base_name}.npy"), cleaned.astype(np.int32))
+
+    if not has_gt:
+        return None, None, timings
+    gt = np.load(os.path.join(split_dir, "masks_npy", f"{base_name}.npy"))
+    return confusion_matrix(pred, gt), confusion_matrix(cleaned, gt), timings
+
+def postprocess_split(split='test', pred_subdir='predictions_npy', output_subdir='predictions_clean_npy',
+                      options=None, workers=None):
+    """
+    Pós-processa todas as predições de um split em um pool de processos e relata ganho x custo
+    """
+    print(f"🧹 Pós-processando predições ({split})...")
+    print("="*60)
+
+    split_dir = f"dataset_final/{split}"
+    pred_dir = os.path.join(split_dir, pred_subdir)
+    output_dir = os.path.join(split_dir, output_subdir)
+    catalog = get_catalog()
+    if not catalog.exists(pred_dir):
+        print(f"❌ Predições não encontradas: {pred_dir}")
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Existência do ground truth resolvida aqui pelo catálogo (os workers não listam pastas)
+    base_names = [f[:-4] for f in catalog.listdir(pred_dir, suffix='.npy')]
+    gt_dir = os.path.join(split_dir, "masks_npy")
+    gt_names = set(catalog.listdir(gt_dir)) if catalog.exists(gt_dir) else set()
+    tasks = [(name, pred_dir, split_dir, output_dir, options, f"{name}.npy" in gt_names) for name in base_names]
+
+    before = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.int64)
+    after = np.zeros_like(before)
+    stage_ms = {}
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for conf_before, conf_after, timings in tqdm(pool.map(_process_one, tasks, chunksize=8),
+                                                     total=len(tasks), desc="Pós-processando"):
+            if conf_before is not None:
+                before += conf_before
+                after += conf_after
+            for stage, ms in timings.items():
+                stage_ms[stage] = stage_ms.get(stage, 0.0) + ms
+    wall = time.perf_counter() - start
+
+    iou_before = iou_from_confusion(before)
+    iou_after = iou_from_confusion(after)
+    n = max(len(tasks), 1)
+
+    print(f"\n📊 IoU por classe (antes → depois):")
+    for class_id, name in enumerate(['Fundo', 'Gato', 'Cachorro'][:NUM_CLASSES]):
+        print(f"   {name}: {iou_before[class_id]:.4f} → {iou_after[class_id]:.4f}")
+    gain = np.nanmean(iou_after) - np.nanmean(iou_before)
+    print(f"   mIoU: {np.nanmean(iou_before):.4f} → {np.nanmean(iou_after):.4f} ({gain:+.4f})")
+
+    print(f"\n⏱️  Custo por imagem:")
+    for stage, total in stage_ms.items():
+        print(f"   {stage}: {total / n:.2f} ms")
+    print(f"   total (CPU): {sum(stage_ms.values()) / n:.2f} ms | parede: {wall * 1000 / n:.2f} ms")
+    print(f"💾 Máscaras limpas salvas em: {output_dir}/")
+
+    return {'iou_before': iou_before, 'iou_after': iou_after, 'miou_gain': gain,
+            'ms_per_image': {stage: total / n for stage, total in stage_ms.items()}}
+
+if __name__ == "__main__":
+    postprocess_split('test')
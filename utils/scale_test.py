@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import pstats
+import signal
+import cProfile
+import traceback
+import multiprocessing
+from queue import Empty
+import numpy as np
+import cv2
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
+from file_catalog import get_catalog
+from convert_labelme_to_masks import process_train_jsons, verify_masks
+from organize_final_dataset import (organize_complete_dataset, handle_test1_folder,
+                                    create_dataset_info, verify_final_dataset)
+from analyze_output import analyze_output_folder, compare_with_train_masks, check_format_consistency
+
+try:
+    import resource
+except ImportError:  # Windows: pico de memória não disponível
+    resource = None
+
+NUM_IMAGES = 50_000
+IMAGE_SIZE = (160, 120)     # (largura, altura) das imagens sintéticas
+UNANNOTATED_SHARE = 0.1     # Fração do corpus que vai para test1/ (sem anotação)
+REPORT_PATH = "results/scale_test_report.json"
+FLAME_PATH = "results/scale_test_flame.folded"
+POLL_SECONDS = 1.0          # Intervalo de checagem do processo da etapa enquanto espera o resultado
+
+# Orçamentos por etapa: vazão mínima (imagens do corpus por segundo) e pico de memória (RSS).
+# Referência (50 mil imagens, 1 CPU): convert 587 img/s / 252 MB, organize 384 img/s / 466 MB,
+# verify 4368 img/s / 299 MB
+BUDGETS = {
+    'convert': {'min_images_per_s': 300, 'max_peak_rss_mb': 400},
+    'organize': {'min_images_per_s': 200, 'max_peak_rss_mb': 600},
+    'verify': {'min_images_per_s': 2000, 'max_peak_rss_mb': 400},
+}
+
+def _synthesize_chunk(task):
+    """
+    Worker: gera imagens, JSONs do LabelMe e as saídas do labelme2voc (output/) de um intervalo
+    """
+    start, stop, size, seed, unannotated_every = task
+    width, height = size
+    yy, xx = np.mgrid[0:height, 0:width]
+
+    for i in range(start, stop):
+        rng = np.random.default_rng([seed, i])
+        # Fundo suave + ruído leve: JPEG com tamanho parecido com o de uma foto pequena
+        base = rng.integers(0, 256, 3)
+        image = (base + 40 * np.sin(xx[..., None] / rng.uniform(5, 30) + rng.uniform(0, 6, 3))
+                 + rng.normal(0, 6, (height, width, 3)))
+        image = np.clip(image, 0, 255).astype(np.uint8)
+        ok, jpeg = cv2.imencode('.jpg', image)
+
+        if unannotated_every and i % unannotated_every == unannotated_every - 1:
+            with open(f"test1/{i}.jpg", 'wb') as f:
+                f.write(jpeg.tobytes())
+            continue
+
+        class_name = 'cat' if i % 2 == 0 else 'dog'
+        name = f"{class_name}.{i}"
+        with open(f"train/{name}.jpg", 'wb') as f:
+            f.write(jpeg.tobytes())
+
+        # Polígono estrelado ao redor de um centro aleatório
+        n_vertices = int(rng.integers(8, 24))
+        angles = np.sort(rng.uniform(0, 2 * np.pi, n_vertices))
+        radius = rng.uniform(0.2, 0.45) * min(width, height) * rng.uniform(0.7, 1.0, n_vertices)
+        center = rng.uniform(0.35, 0.65, 2) * (width, height)
+        points = np.stack([center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)], axis=1)
+        points = np.clip(points, 0, (width - 1, height - 1))
+
+        annotation = {
+            'version': '5.2.1', 'flags': {},
+            'shapes': [{'label': class_name, 'points': points.round(2).tolist(), 'group_id': None,
+                        'shape_type': 'polygon', 'flags': {}}],
+            'imagePath': f"{name}.jpg",
+            'imageData': base64.b64encode(jpeg.tobytes()).decode(),
+            'imageHeight': height, 'imageWidth': width,
+        }
+        with open(f"train/{name}.json", 'w', encoding='utf-8') as f:
+            json.dump(annotation, f)
+
+        # Saídas equivalentes às do labelme2voc (PNG/NPY de classe, JPEG e objetos)
+        labels = np.zeros((height, width), dtype=np.int32)
+        cv2.fillPoly(labels, [points.astype(np.int32)], 1 if class_name == 'cat' else 2)
+        cv2.imwrite(f"output/SegmentationClass/{name}.png", labels.astype(np.uint8))
+        np.save(f"output/SegmentationClassNpy/{name}.npy", labels)
+        os.link(f"train/{name}.jpg", f"output/JPEGImages/{name}.jpg")
+        os.link(f"output/SegmentationClass/{name}.png", f"output/SegmentationObject/{name}.png")
+    return stop - start
+
+def _stage_synthesize(num_images=NUM_IMAGES, size=IMAGE_SIZE, seed=0, workers=None):
+    for folder in ['train', 'test1', 'output/JPEGImages', 'output/SegmentationClass',
+                   'output/SegmentationClassNpy', 'output/SegmentationObject']:
+        os.makedirs(folder, exist_ok=True)
+    with open('output/class_names.txt', 'w', encoding='utf-8') as f:
+        f.write("_background_\ncat\ndog\n")
+
+    unannotated_every = round(1 / UNANNOTATED_SHARE) if UNANNOTATED_SHARE else 0
+    chunk = 500
+    tasks = [(start, min(start + chunk, num_images), size, seed, unannotated_every)
+             for start in range(0, num_images, chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_synthesize_chunk, tasks))
+
+def _stage_convert():
+    process_train_jsons()
+    verify_masks()
+    get_catalog().save()
+
+def _stage_organize():
+    organize_complete_dataset()
+    handle_test1_folder()
+    create_dataset_info()
+    get_catalog().save()
+
+def _stage_verify():
+    analyze_output_folder()
+    compare_with_train_masks()
+    check_format_consistency()
+    verify_final_dataset()
+    get_catalog().save()
+
+STAGES = {
+    'synthesize': _stage_synthesize,
+    'convert': _stage_convert,
+    'organize': _stage_organize,
+    'verify': _stage_verify,
+}
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def _stage_process(stage, workspace, kwargs, queue):
+    """
+    Processo isolado por etapa: o pico de RSS medido é só desta etapa
+    """
+    try:
+        # Grupo de processos próprio: se a etapa morrer, run_stage encerra os workers que sobrarem
+        if hasattr(os, 'setpgrp'):
+            os.setpgrp()
+        os.chdir(workspace)
+        baseline = _peak_rss_mb()
+        profiler = cProfile.Profile()
+        with open(f"{stage}.log", 'w', encoding='utf-8') as log, redirect_stdout(log), redirect_stderr(log):
+            start = time.perf_counter()
+            profiler.runcall(STAGES[stage], **kwargs)
+            seconds = time.perf_counter() - start
+        profiler.dump_stats(f"{stage}.prof")
+        queue.put({'seconds': seconds, 'baseline_rss_mb': baseline, 'peak_rss_mb': _peak_rss_mb()})
+    except BaseException:
+        queue.put({'error': traceback.format_exc()})
+
+def _kill_stage_group(process):
+    """
+    Encerra o que a etapa deixou para trás (ex.: workers de um ProcessPoolExecutor órfãos)
+    """
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def run_stage(stage, workspace, timeout=None, **kwargs):
+    """
+    Executa uma etapa em um processo novo (spawn) com cProfile e retorna as medidas.
+
+    Processo que morre sem responder (ex.: morto pelo OOM killer) ou que passa de `timeout`
+    segundos vira {'error': ...} em vez de travar a espera para sempre.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_stage_process, args=(stage, os.path.abspath(workspace), kwargs, queue))
+    process.start()
+    deadline = time.monotonic() + timeout if timeout else None
+
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=POLL_SECONDS)
+        except Empty:
+            if not process.is_alive():
+                # Última chance: o resultado pode ter chegado junto com a saída do processo
+                try:
+                    result = queue.get(timeout=POLL_SECONDS)
+                except Empty:
+                    result = {'error': f"processo terminou sem resultado (exitcode {process.exitcode})"}
+                    _kill_stage_group(process)
+            elif deadline is not None and time.monotonic() > deadline:
+                process.terminate()
+                _kill_stage_group(process)
+                result = {'error': f"tempo limite de {timeout:.0f} s excedido"}
+    process.join()
+    return result
+
+def flame_summary(profile_path, root_name, max_depth=12, min_share=0.02):
+    """
+    Árvore de chamadas da etapa (tempo acumulado por caminho) a partir do cProfile.
+
+    Retorna (linhas [(profundidade, fração, função)], pilhas "a;b;c segundos") no formato
+    "folded" dos flame graphs. O tempo de cada aresta vem do grafo chamador->chamado,
+    então funções chamadas de vários contextos são uma aproximação.
+    """
+    stats = pstats.Stats(profile_path).stats
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, {})[func] = edge[3]
+
+    roots = [func for func in stats if func[2] == root_name]
+    if not roots:
+        return [], []
+    root = max(roots, key=lambda func: stats[func][3])
+    total = stats[root][3] or 1e-9
+
+    label = lambda func: f"{func[2]} ({os.path.basename(func[0])}:{func[1]})" if func[1] else func[2]
+    lines, folded = [], []
+
+    def walk(func, seconds, depth, path):
+        lines.append((depth, seconds / total, label(func)))
+        path = path + [func]
+        kids = []
+        if depth < max_depth:
+            kids = sorted(((child, t) for child, t in children.get(func, {}).items()
+                           if child not in path and t >= min_share * total), key=lambda kv: -kv[1])
+        for child, t in kids:
+            walk(child, min(t, seconds), depth + 1, path)
+        self_time = max(seconds - sum(min(t, seconds) for _, t in kids), 0.0)
+        if self_time > 0:
+            folded.append(f"{';'.join(label(f) for f in path)} {self_time:.6f}")
+
+    walk(root, total, 0, [])
+    return lines, folded
+
+def run_scale_test(num_images=NUM_IMAGES, workspace='scale_test_workspace', budgets=None,
+                   report_path=REPORT_PATH, flame_path=FLAME_PATH, keep_workspace=False, stage_timeout=None):
+    """
+    Teste de escala ponta a ponta: sintetiza o corpus, roda conversão -> organização ->
+    verificação (cada etapa em processo próprio) e confere vazão e pico de memória.
+    Etapa que falha, morre ou passa de stage_timeout segundos reprova o teste
+    """
+    print(f"📏 Teste de escala: {num_images} imagens sintéticas")
+    print("="*60)
+
+    budgets = budgets or BUDGETS
+    if os.path.exists(workspace):
+        shutil.rmtree(workspace)
+    os.makedirs(workspace)
+
+    print("🧪 Sintetizando corpus...")
+    synth = run_stage('synthesize', workspace, num_images=num_images)
+    if 'error' in synth:
+        raise RuntimeError(f"Etapa synthesize falhou:\n{synth['error']}")
+    print(f"   ⏱️  {synth['seconds']:.1f} s")
+
+    stages = {}
+    for stage in ['convert', 'organize', 'verify']:
+        print(f"▶️  {stage}...")
+        result = run_stage(stage, workspace, timeout=stage_timeout)
+        budget = budgets.get(stage, {})
+        if 'error' in result:
+            # Etapa morta/com exceção: reprovada, e as seguintes dependem da saída dela
+            stages[stage] = {'passed': False, 'failures': [result['error']], 'budget': budget}
+            print(f"   ❌ falhou: {result['error'].strip().splitlines()[-1]}")
+            break
+        result['images_per_s'] = num_images / result['seconds'] if result['seconds'] else float('inf')
+        result['budget'] = budget
+
+        failures = []
+        if result['images_per_s'] < budget.get('min_images_per_s', 0):
+            failures.append(f"vazão {result['images_per_s']:.0f} img/s < {budget['min_images_per_s']}")
+        if result['peak_rss_mb'] is not None and result['peak_rss_mb'] > budget.get('max_peak_rss_mb', float('inf')):
+            failures.append(f"pico {result['peak_rss_mb']:.0f} MB > {budget['max_peak_rss_mb']}")
+        result['passed'] = not failures
+        result['failures'] = failures
+        stages[stage] = result
+
+        icon = '✅' if result['passed'] else '❌'
+        peak = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "n/d"
+        print(f"   {icon} {result['seconds']:.1f} s | {result['images_per_s']:.0f} img/s | pico RSS {peak}")
+        for failure in failures:
+            print(f"      ⚠️  {failure}")
+
+    completed = [s for s in stages if 'seconds' in stages[s]]
+    slowest = max(completed, key=lambda s: stages[s]['seconds'], default=None)
+    lines, folded = [], []
+    if slowest is not None:
+        lines, folded = flame_summary(os.path.join(workspace, f"{slowest}.prof"), f"_stage_{slowest}")
+        print(f"\n🔥 Etapa mais lenta: {slowest} ({stages[slowest]['seconds']:.1f} s)")
+    for depth, share, name in lines[:25]:
+        bar = '█' * max(1, round(share * 20))
+        print(f"   {share:6.1%} {'  ' * depth}{bar} {name}")
+
+    report = {
+        'num_images': num_images,
+        'image_size': list(IMAGE_SIZE),
+        'cpu_count': os.cpu_count(),
+        'synthesize_seconds': synth['seconds'],
+        'stages': stages,
+        'slowest_stage': slowest,
+        'flame': [{'depth': d, 'share': s, 'function': n} for d, s, n in lines],
+        'passed': len(stages) == 3 and all(s['passed'] for s in stages.values()),
+    }
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    with open(flame_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(folded) + '\n')
+    print(f"\n💾 Relatório: {report_path} | pilhas (flame graph): {flame_path}")
+
+    if not keep_workspace:
+        shutil.rmtree(workspace)
+    print("🎉 Todos os orçamentos respeitados!" if report['passed'] else "❌ Orçamento estourado!")
+    return report
+
+if __name__ == "__main__":
+    report = run_scale_test()
+    sys.exit(0 if report['passed'] else 1)
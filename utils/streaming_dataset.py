@@ -0,0 +1,281 @@
+import os
+import json
+import math
+import numpy as np
+import cv2
+import torch
+from torch.utils.data import IterableDataset, DataLoader, get_worker_info
+from file_catalog import get_catalog
+from bucket_sampler import IGNORE_INDEX
+
+SHARDS_DIR = "dataset_final/shards"
+SHARD_EXT = '.bin'
+
+def write_shards(split='train', output_dir=None, samples_per_shard=512, dataset_dir='dataset_final'):
+    """
+    Empacota um split em shards grandes e sequenciais (JPEG original + máscara em PNG)
+
+    Cada shard é um .bin com os registros concatenados e um .json com os offsets.
+    Imagens sem máscara são gravadas sem ela (máscara vazia): na leitura viram
+    IGNORE_INDEX, não fundo.
+    """
+    output_dir = output_dir or os.path.join(SHARDS_DIR, split)
+    os.makedirs(output_dir, exist_ok=True)
+
+    images_dir = os.path.join(dataset_dir, split, 'images')
+    masks_dir = os.path.join(dataset_dir, split, 'masks_npy')
+    catalog = get_catalog()
+
+    base_names = [os.path.splitext(f)[0] for f in catalog.listdir(images_dir, suffix='.jpg')]
+    has_masks = catalog.exists(masks_dir)
+    mask_names = set(catalog.listdir(masks_dir, suffix='.npy')) if has_masks else set()
+
+    shards = []
+    counts = []
+    for shard_index, start in enumerate(range(0, len(base_names), samples_per_shard)):
+        shard_name = f"{split}-{shard_index:05d}"
+        records = []
+        with open(os.path.join(output_dir, shard_name + SHARD_EXT), 'wb') as f:
+            for base_name in base_names[start:start + samples_per_shard]:
+                with open(os.path.join(images_dir, f"{base_name}.jpg"), 'rb') as img_file:
+                    image_bytes = img_file.read()
+
+                mask_bytes = b''
+                if f"{base_name}.npy" in mask_names:
+                    mask = np.load(os.path.join(masks_dir, f"{base_name}.npy")).astype(np.uint8)
+                    mask_bytes = cv2.imencode('.png', mask)[1].tobytes()
+
+                records.append([base_name, f.tell(), len(image_bytes), len(mask_bytes)])
+                f.write(image_bytes)
+                f.write(mask_bytes)
+
+        with open(os.path.join(output_dir, shard_name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump({'records': records}, f)
+        shards.append(shard_name)
+        counts.append(len(records))
+
+    with open(os.path.join(output_dir, 'shards.json'), 'w', encoding='utf-8') as f:
+        json.dump({'split': split, 'shards': shards, 'counts': counts, 'num_samples': len(base_names)}, f, indent=2)
+
+    print(f"✅ {len(base_names)} amostras de {split} em {len(shards)} shards: {output_dir}/")
+    return shards
+
+def _distributed_context():
+    """
+    (rank, world_size) do torch.distributed, ou (0, 1) fora de treino distribuído
+    """
+    if torch.distributed.is_available() and torch.distributed.is_initialized():
+        return torch.distributed.get_rank(), torch.distributed.get_world_size()
+    return 0, 1
+
+class ShardedStreamingDataset(IterableDataset):
+    """
+    Dataset iterável em shards: cada (rank, worker) lê um trecho contíguo da sequência
+    de shards da época e embaralha com um buffer configurável.
+
+    Como o DistributedSampler, só os ranks são igualados: cada um recebe ceil(N / ranks)
+    amostras (os últimos completam com as primeiras da época; com drop_last=True, floor
+    sem repetir nada). Com um único rank, cada amostra aparece exatamente uma vez.
+    Dentro do rank, os workers recebem blocos de batch_size e diferem em no máximo um
+    batch; state_dict leva isso em conta.
+
+    A ordem é determinística por (seed, epoch, worker global), o que permite retomar
+    de um checkpoint pulando os registros já consumidos sem decodificá-los.
+    """
+
+    def __init__(self, shard_dir, shuffle_buffer=256, seed=42, size=128, rank=None, world_size=None,
+                 batch_size=16, drop_last=False):
+        with open(os.path.join(shard_dir, 'shards.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        self.shard_dir = shard_dir
+        self.shards = manifest['shards']
+        self.num_samples = manifest['num_samples']
+        self.counts = manifest.get('counts') or [len(self._load_records(name)) for name in self.shards]
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.size = size
+        self.batch_size = batch_size
+        self.drop_last = drop_last
+        self.rank, self.world_size = _distributed_context()
+        if rank is not None:
+            self.rank, self.world_size = rank, world_size
+        self.epoch = 0
+        self._resume = None
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self._resume = None
+
+    def samples_per_rank(self):
+        if self.drop_last:
+            return self.num_samples // self.world_size
+        return math.ceil(self.num_samples / self.world_size)
+
+    def worker_sizes(self, num_workers=1):
+        """
+        Amostras de cada worker deste rank: os batches do rank são distribuídos em rodízio
+        (worker 0, 1, ...), e o batch parcial do fim fica com o worker da vez
+        """
+        workers = max(1, num_workers)
+        total = self.samples_per_rank()
+        n_batches = math.ceil(total / self.batch_size)
+        sizes = [max(0, math.ceil((n_batches - w) / workers)) * self.batch_size for w in range(workers)]
+        if n_batches:
+            sizes[(n_batches - 1) % workers] -= n_batches * self.batch_size - total
+        return sizes
+
+    def _resumed(self, num_workers):
+        """
+        Amostras já entregues por worker no início desta iteração (zeros sem retomada)
+        """
+        if not self._resume or self._resume['epoch'] != self.epoch:
+            return [0] * num_workers
+        for key, current in [('num_workers', num_workers), ('batch_size', self.batch_size),
+                             ('drop_last', self.drop_last)]:
+            if self._resume[key] != current:
+                raise ValueError(f"Checkpoint com {key}={self._resume[key]}, atual {current}")
+        return list(self._resume['consumed'])
+
+    def state_dict(self, batches_consumed, num_workers=0):
+        """
+        Posição para checkpoint: amostras consumidas (absolutas na época) por worker deste rank.
+        batches_consumed conta os batches recebidos do DataLoader desde o início desta
+        iteração — depois de uma retomada, a partir dela.
+        """
+        workers = max(1, num_workers)
+        sizes = self.worker_sizes(workers)
+        consumed = self._resumed(workers)
+        remaining = [math.ceil((size - done) / self.batch_size) for size, done in zip(sizes, consumed)]
+
+        # O DataLoader sempre recomeça no worker 0 e alterna só entre os workers que ainda
+        # têm batches: a rodada r tem, em ordem de id, os workers com mais de r batches restantes
+        left = batches_consumed
+        for round_index in range(max(remaining, default=0)):
+            for w in range(workers):
+                if left and remaining[w] > round_index:
+                    consumed[w] = min(consumed[w] + self.batch_size, sizes[w])
+                    left -= 1
+        return {'epoch': self.epoch, 'rank': self.rank, 'world_size': self.world_size,
+                'num_workers': workers, 'batch_size': self.batch_size, 'drop_last': self.drop_last,
+                'consumed': consumed}
+
+    def load_state_dict(self, state):
+        if state['world_size'] != self.world_size:
+            raise ValueError(f"Checkpoint com world_size={state['world_size']}, atual {self.world_size}")
+        self.epoch = state['epoch']
+        self._resume = state
+
+    def _load_records(self, shard_name):
+        with open(os.path.join(self.shard_dir, shard_name + '.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)['records']
+
+    def _worker_plan(self):
+        """
+        Trechos (shard, primeiro, último registro) do worker atual: o trecho do rank
+        [rank * R, (rank + 1) * R) da sequência de shards da época (com volta ao início
+        só no preenchimento entre ranks), dividido em partes contíguas por worker
+        """
+        info = get_worker_info()
+        worker_id, num_workers = (info.id, info.num_workers) if info else (0, 1)
+        global_id = self.rank * num_workers + worker_id
+        sizes = self.worker_sizes(num_workers)
+
+        # Mesma permutação de shards em todos os processos (depende só de seed e época)
+        order = np.random.default_rng([self.seed, self.epoch]).permutation(len(self.shards))
+        counts = np.array([self.counts[i] for i in order], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(counts)])
+
+        segments = []
+        position = self.rank * self.samples_per_rank() + sum(sizes[:worker_id])
+        remaining = sizes[worker_id]
+        while remaining > 0:
+            p = position % self.num_samples
+            take = min(remaining, self.num_samples - p)
+            # Converte o intervalo global [p, p + take) em trechos de shards
+            for k in range(len(order)):
+                lo = max(p, starts[k]) - starts[k]
+                hi = min(p + take, starts[k + 1]) - starts[k]
+                if hi > lo:
+                    segments.append((self.shards[order[k]], int(lo), int(hi)))
+            position += take
+            remaining -= take
+        return worker_id, num_workers, global_id, segments
+
+    def _records(self, segments):
+        """
+        Lê os registros brutos (bytes) de cada trecho em ordem, sequencialmente
+        """
+        for shard_name, lo, hi in segments:
+            records = self._load_records(shard_name)[lo:hi]
+            with open(os.path.join(self.shard_dir, shard_name + SHARD_EXT), 'rb') as f:
+                f.seek(records[0][1])
+                for name, _, image_len, mask_len in records:
+                    image_bytes = f.read(image_len)
+                    mask_bytes = f.read(mask_len)
+                    yield name, image_bytes, mask_bytes
+
+    def _shuffled(self, records, rng):
+        """
+        Buffer de embaralhamento: guarda bytes codificados, não amostras decodificadas
+        """
+        buffer = []
+        for record in records:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(record)
+                continue
+            i = rng.integers(len(buffer))
+            yield buffer[i]
+            buffer[i] = record
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _decode(self, name, image_bytes, mask_bytes):
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        if mask_bytes:
+            mask = cv2.imdecode(np.frombuffer(mask_bytes, np.uint8), cv2.IMREAD_UNCHANGED)
+        else:
+            # Sem anotação: ignorado pela loss/métricas (não é fundo)
+            mask = np.full(image.shape[:2], IGNORE_INDEX, dtype=np.uint8)
+
+        if self.size:
+            image = cv2.resize(image, (self.size, self.size), interpolation=cv2.INTER_LINEAR)
+            mask = cv2.resize(mask, (self.size, self.size), interpolation=cv2.INTER_NEAREST)
+
+        image = torch.from_numpy(image).permute(2, 0, 1).float().div_(255.0)
+        return image, torch.from_numpy(mask.astype(np.int64)), name
+
+    def __iter__(self):
+        worker_id, num_workers, global_id, segments = self._worker_plan()
+        rng = np.random.default_rng([self.seed, self.epoch, global_id])
+        stream = self._shuffled(self._records(segments), rng)
+
+        # Retomada: pula (sem decodificar) as amostras que este worker já entregou
+        skip = self._resumed(num_workers)[worker_id]
+
+        for position, record in enumerate(stream):
+            if position < skip:
+                continue
+            yield self._decode(*record)
+
+def make_loader(split='train', batch_size=16, num_workers=2, shuffle_buffer=256, seed=42, epoch=0,
+                drop_last=False):
+    """
+    DataLoader de streaming para um split já empacotado em shards
+    """
+    dataset = ShardedStreamingDataset(os.path.join(SHARDS_DIR, split), shuffle_buffer=shuffle_buffer, seed=seed,
+                                      batch_size=batch_size, drop_last=drop_last)
+    dataset.set_epoch(epoch)
+    return DataLoader(dataset, batch_size=batch_size, num_workers=num_workers)
+
+if __name__ == "__main__":
+    print("📦 Empacotando splits em shards...")
+    print("="*60)
+    for split in ['train', 'val', 'test']:
+        if get_catalog().exists(f"dataset_final/{split}/images"):
+            write_shards(split)
+
+    print("\n🔁 Verificando leitura em streaming (val, 2 workers)...")
+    names = [name for _, _, batch_names in make_loader('val', batch_size=8) for name in batch_names]
+    print(f"   📷 Amostras lidas: {len(names)} | únicas: {len(set(names))}")
@@ -0,0 +1,227 @@
+import os
+import time
+import numpy as np
+import cv2
+import torch
+import torch.nn.functional as F
+from file_catalog import get_catalog
+
+MODEL_PATH = "results/model.pt"
+TILE_SIZE = 128      # Resolução em que o modelo foi treinado
+NUM_CLASSES = 3      # Fundo, Gato, Cachorro
+
+def load_model(model_path=MODEL_PATH, eager=False):
+    """
+    Carrega o modelo de segmentação (TorchScript ou módulo PyTorch salvo inteiro).
+    Com eager=True exige o nn.Module salvo com torch.save(model) (necessário para a
+    quantização FX, que não funciona em TorchScript)
+    """
+    if eager:
+        model = torch.load(model_path, map_location='cpu', weights_only=False)
+        if isinstance(model, torch.jit.ScriptModule) or not isinstance(model, torch.nn.Module):
+            raise ValueError(f"{model_path} não é um nn.Module eager (salve com torch.save(model), não TorchScript)")
+    else:
+        try:
+            model = torch.jit.load(model_path, map_location='cpu')
+        except RuntimeError:
+            model = torch.load(model_path, map_location='cpu', weights_only=False)
+    model.eval()
+    return model
+
+def preprocess_tiles(tiles):
+    """
+    Converte tiles RGB uint8 (N, H, W, 3) para tensor float (N, 3, H, W) em [0, 1]
+    """
+    return torch.from_numpy(np.ascontiguousarray(tiles)).permute(0, 3, 1, 2).float().div_(255.0)
+
+def tile_positions(length, tile, stride):
+    """
+    Posições iniciais das janelas cobrindo [0, length) (a última encosta na borda)
+    """
+    if length <= tile:
+        return [0]
+    positions = list(range(0, length - tile + 1, stride))
+    if positions[-1] != length - tile:
+        positions.append(length - tile)
+    return positions
+
+def blend_window(tile):
+    """
+    Peso 2D senoidal: máximo no centro do tile, pequeno (mas > 0) nas bordas
+    """
+    ramp = np.sin(np.pi * (np.arange(tile) + 0.5) / tile).astype(np.float32)
+    return np.outer(ramp, ramp)
+
+class _TiledImage:
+    """
+    Estado de uma imagem em inferência: acumula apenas uma faixa de altura = tile
+    e acrescenta as linhas já finalizadas ao .npy de saída (arquivo aberto, em ordem).
+
+    Memória por imagem: a imagem decodificada inteira (H x W x 3 uint8: cv2/PIL não
+    decodificam JPEG por faixas, então esse é o piso) + a faixa de num_classes x tile x W
+    float32 (mais o peso tile x W). A predição H x W não fica em memória.
+    """
+
+    def __init__(self, image, output, tile, stride, num_classes):
+        self.height, self.width = image.shape[:2]
+        pad_h = max(tile - self.height, 0)
+        pad_w = max(tile - self.width, 0)
+        if pad_h or pad_w:
+            image = cv2.copyMakeBorder(image, 0, pad_h, 0, pad_w, cv2.BORDER_REFLECT_101)
+
+        self.image = image
+        self.output = output
+        self.tile = tile
+        self.ys = tile_positions(image.shape[0], tile, stride)
+        self.xs = tile_positions(image.shape[1], tile, stride)
+        self.band_top = 0
+        self.current_row = 0
+        self.acc = np.zeros((num_classes, tile, image.shape[1]), dtype=np.float32)
+        self.weight = np.zeros((tile, image.shape[1]), dtype=np.float32)
+
+    def tiles(self):
+        """
+        Gera (índice da linha, y, x, tile) em ordem de varredura
+        """
+        for row, y in enumerate(self.ys):
+            for x in self.xs:
+                yield row, y, x, self.image[y:y + self.tile, x:x + self.tile]
+
+    def add(self, row, y, x, probs, window):
+        """
+        Soma a predição ponderada de um tile na faixa; avança a faixa ao mudar de linha
+        """
+        while row > self.current_row:
+            self._finalize_rows(self.ys[self.current_row + 1])
+            self.current_row += 1
+
+        top = y - self.band_top
+        self.acc[:, top:top + self.tile, x:x + self.tile] += probs * window
+        self.weight[top:top + self.tile, x:x + self.tile] += window
+
+    def finish(self):
+        self._finalize_rows(self.band_top + self.tile)
+
+    def _finalize_rows(self, stop):
+        """
+        Grava as linhas [band_top, stop) na saída e desloca a faixa
+        """
+        count = stop - self.band_top
+        rows_out = min(stop, self.height) - self.band_top
+        if rows_out > 0:
+            probs = self.acc[:, :rows_out] / np.maximum(self.weight[:rows_out], 1e-8)
+            labels = probs.argmax(axis=0)[:, :self.width].astype(np.int32)
+            self.output.write(labels.tobytes())
+
+        # Desloca a faixa no próprio buffer (sem realocar)
+        self.acc[:, :-count] = self.acc[:, count:]
+        self.weight[:-count] = self.weight[count:]
+        self.acc[:, -count:] = 0
+        self.weight[-count:] = 0
+        self.band_top = stop
+
+def _run_batch(model, batch, window, tile):
+    """
+    Executa o modelo em um batch de tiles (de uma ou várias imagens) e distribui o resultado
+    """
+    inputs = preprocess_tiles(np.stack([item[4] for item in batch]))
+    with torch.no_grad():
+        logits = model(inputs)
+        if logits.shape[-2:] != (tile, tile):
+            logits = F.interpolate(logits, size=(tile, tile), mode='bilinear', align_corners=False)
+        probs = torch.softmax(logits, dim=1).numpy()
+
+    for (state, row, y, x, _), tile_probs in zip(batch, probs):
+        state.add(row, y, x, tile_probs, window)
+
+def predict_tiled(model, image_paths, output_dir, tile=TILE_SIZE, overlap=32, batch_size=32,
+                  num_classes=NUM_CLASSES):
+    """
+    Inferência em janelas sobrepostas na resolução original, com blending ponderado.
+
+    Tiles de imagens consecutivas são agrupados no mesmo batch. Cada predição é
+    gravada como .npy (int32, mesmo formato de masks_npy) linha a linha, à medida que
+    as faixas são finalizadas.
+
+    A memória NÃO é limitada pela largura: o piso é o decode do cv2.imread da imagem
+    inteira. Medido em 8000x6000 (JPEG de 22 MB, modelo trivial): pico de ~280 MB acima
+    do processo com torch carregado, igual ao de um cv2.imread sozinho (~2 x H x W x 3
+    durante o decode); a faixa de blending e a saída somam poucos MB a isso.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stride = tile - overlap
+    window = blend_window(tile)
+
+    batch = []
+    open_states = []
+    n_tiles = 0
+    n_pixels = 0
+    start = time.perf_counter()
+
+    for image_path in image_paths:
+        image = cv2.imread(image_path)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)  # In-place: uma cópia da imagem só
+        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        output = open(os.path.join(output_dir, f"{base_name}.npy"), 'wb')
+        np.lib.format.write_array_header_1_0(output, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.int32)),
+                                                      'fortran_order': False, 'shape': image.shape[:2]})
+
+        state = _TiledImage(image, output, tile, stride, num_classes)
+        open_states.append(state)
+        n_pixels += image.shape[0] * image.shape[1]
+
+        for row, y, x, tile_img in state.tiles():
+            batch.append((state, row, y, x, tile_img))
+            if len(batch) == batch_size:
+                _run_batch(model, batch, window, tile)
+                n_tiles += len(batch)
+                batch = []
+
+                # Imagens cujos tiles já foram todos processados podem ser fechadas
+                for done in open_states[:-1]:
+                    done.finish()
+                    done.output.close()
+                open_states = open_states[-1:]
+
+    if batch:
+        _run_batch(model, batch, window, tile)
+        n_tiles += len(batch)
+    for state in open_states:
+        state.finish()
+        state.output.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'images': len(image_paths),
+        'tiles': n_tiles,
+        'seconds': elapsed,
+        'tiles_per_s': n_tiles / elapsed if elapsed else 0.0,
+        'megapixels_per_s': n_pixels / 1e6 / elapsed if elapsed else 0.0,
+    }
+
+def predict_split(split='test', model_path=MODEL_PATH, overlap=32, batch_size=32):
+    """
+    Roda a inferência em tiles sobre um split inteiro do dataset_final
+    """
+    print(f"🧩 Inferência em tiles ({split})...")
+    print("="*60)
+
+    if not os.path.exists(model_path):
+        print(f"❌ Modelo não encontrado: {model_path}")
+        return None
+
+    images_dir = f"dataset_final/{split}/images"
+    output_dir = f"dataset_final/{split}/predictions_npy"
+    image_paths = [os.path.join(images_dir, f) for f in get_catalog().listdir(images_dir, suffix='.jpg')]
+
+    stats = predict_tiled(load_model(model_path), image_paths, output_dir,
+                          overlap=overlap, batch_size=batch_size)
+
+    print(f"   📷 Imagens: {stats['images']}")
+    print(f"   🧩 Tiles: {stats['tiles']}")
+    print(f"   ⏱️  {stats['tiles_per_s']:.1f} tiles/s | {stats['megapixels_per_s']:.2f} Mpx/s")
+    print(f"   💾 Predições salvas em: {output_dir}/")
+    return stats
+
+if __name__ == "__main__":
+    predict_split('test')
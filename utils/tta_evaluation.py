@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import numpy as np
+import torch
+import torch.nn.functional as F
+from tiled_inference import MODEL_PATH, NUM_CLASSES, load_model, preprocess_tiles
+from batch_augmentation import load_split_arrays
+from postprocess_masks import confusion_matrix, iou_from_confusion
+
+REPORT_PATH = "results/tta_report.json"
+SIZE_ALIGN = 32  # Canvas comum múltiplo do passo total do encoder
+
+# Configurações de TTA avaliadas: escalas (relativas à resolução de treino) x flips
+TTA_CONFIGS = {
+    'base': {'scales': (1.0,), 'flips': ('none',)},
+    'hflip': {'scales': (1.0,), 'flips': ('none', 'h')},
+    'hvflip': {'scales': (1.0,), 'flips': ('none', 'h', 'v')},
+    'multiscale': {'scales': (0.75, 1.0, 1.25), 'flips': ('none',)},
+    'multiscale_hflip': {'scales': (0.75, 1.0, 1.25), 'flips': ('none', 'h')},
+}
+
+def _flip(x, flip):
+    if flip == 'h':
+        return x.flip(-1)
+    if flip == 'v':
+        return x.flip(-2)
+    return x
+
+def _align(value, multiple=SIZE_ALIGN):
+    return -(-value // multiple) * multiple
+
+def tta_logits(model, inputs, scales=(1.0,), flips=('none',)):
+    """
+    Logits mescladas (G, C, H, W) de um grupo de imagens (G, 3, H, W).
+
+    Todas as vistas (escalas x flips) vão em um único batch: cada escala é redimensionada
+    e colocada no canto de um canvas comum (borda replicada), então o modelo precisa
+    ser totalmente convolucional. A média é feita no espaço de logits.
+    """
+    G, _, H, W = inputs.shape
+    sizes = [(max(1, round(H * s)), max(1, round(W * s))) for s in scales]
+    canvas_h = _align(max(h for h, _ in sizes))
+    canvas_w = _align(max(w for _, w in sizes))
+
+    views = []
+    for h, w in sizes:
+        scaled = inputs if (h, w) == (H, W) else F.interpolate(inputs, size=(h, w), mode='bilinear',
+                                                                 align_corners=False)
+        if (h, w) != (canvas_h, canvas_w):
+            scaled = F.pad(scaled, (0, canvas_w - w, 0, canvas_h - h), mode='replicate')
+        views.extend(_flip(scaled, flip) for flip in flips)
+
+    with torch.no_grad():
+        logits = model(torch.cat(views))
+        if logits.shape[-2:] != (canvas_h, canvas_w):
+            logits = F.interpolate(logits, size=(canvas_h, canvas_w), mode='bilinear', align_corners=False)
+
+        # (escala, flip, G, C, h, w): desfaz cada flip em todas as escalas de uma vez
+        logits = logits.view(len(scales), len(flips), G, logits.shape[1], canvas_h, canvas_w)
+        unflipped = torch.stack([_flip(logits[:, j], flip) for j, flip in enumerate(flips)]).mean(dim=0)
+
+        merged = torch.zeros(G, logits.shape[3], H, W)
+        for i, (h, w) in enumerate(sizes):
+            view = unflipped[i, ..., :h, :w]
+            if (h, w) != (H, W):
+                view = F.interpolate(view, size=(H, W), mode='bilinear', align_corners=False)
+            merged += view
+    return merged / len(scales)
+
+def scores_from_confusion(confusion):
+    """
+    Acurácia de pixel, IoU por classe e F1 macro a partir da matriz de confusão
+    """
+    tp = np.diag(confusion).astype(np.float64)
+    precision = tp / np.maximum(confusion.sum(axis=0), 1)
+    recall = tp / np.maximum(confusion.sum(axis=1), 1)
+    f1 = np.where(precision + recall > 0, 2 * precision * recall / np.maximum(precision + recall, 1e-12), 0.0)
+    iou = iou_from_confusion(confusion)
+    return {
+        'accuracy': float(tp.sum() / max(confusion.sum(), 1)),
+        'miou': float(np.nanmean(iou)),
+        'macro_f1': float(f1.mean()),
+        'iou_per_class': [float(v) for v in iou],
+    }
+
+def evaluate_config(model, images, masks, scales, flips, batch_size=32):
+    """
+    Avalia uma configuração de TTA: grupos de imagens com batch_size vistas no total
+    """
+    n_views = len(scales) * len(flips)
+    group = max(1, batch_size // n_views)
+    confusion = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.int64)
+
+    tta_logits(model, preprocess_tiles(images[:group]), scales, flips)  # aquecimento
+    model_seconds = 0.0
+    for start in range(0, len(images), group):
+        inputs = preprocess_tiles(images[start:start + group])
+        t0 = time.perf_counter()
+        preds = tta_logits(model, inputs, scales, flips).argmax(dim=1).numpy()
+        model_seconds += time.perf_counter() - t0
+        confusion += confusion_matrix(preds, masks[start:start + group])
+
+    scores = scores_from_confusion(confusion)
+    scores.update({'views': n_views, 'images_per_batch': group,
+                   'ms_per_image': model_seconds * 1000 / max(len(images), 1)})
+    return scores
+
+def pareto_front(results):
+    """
+    Configurações não dominadas (nenhuma outra tem F1 >= e latência <=, com uma estritamente melhor)
+    """
+    front = []
+    for name, r in results.items():
+        dominated = any(o['macro_f1'] >= r['macro_f1'] and o['ms_per_image'] <= r['ms_per_image']
+                        and (o['macro_f1'] > r['macro_f1'] or o['ms_per_image'] < r['ms_per_image'])
+                        for other, o in results.items() if other != name)
+        if not dominated:
+            front.append(name)
+    return front
+
+def evaluate_tta(split='test', model_path=MODEL_PATH, configs=None, batch_size=32, report_path=REPORT_PATH):
+    """
+    Compara as configurações de TTA no split: ganho de métricas x latência extra por imagem
+    """
+    print(f"🔁 Avaliação com TTA ({split})...")
+    print("="*60)
+
+    if not os.path.exists(model_path):
+        print(f"❌ Modelo não encontrado: {model_path}")
+        return None
+
+    configs = configs or TTA_CONFIGS
+    model = load_model(model_path)
+    images, masks = load_split_arrays(split)
+    print(f"📊 {len(images)} imagens | {len(configs)} configurações")
+
+    results = {}
+    for name, config in configs.items():
+        results[name] = evaluate_config(model, images, masks, config['scales'], config['flips'], batch_size)
+        results[name].update({'scales': list(config['scales']), 'flips': list(config['flips'])})
+
+    reference = results.get('base') or next(iter(results.values()))
+    front = pareto_front(results)
+    print(f"\n{'config':>18} | views |  acc   |  mIoU  | F1 macro |  ms/img | ΔF1      | +ms")
+    for name, r in results.items():
+        r['delta_macro_f1'] = r['macro_f1'] - reference['macro_f1']
+        r['delta_accuracy'] = r['accuracy'] - reference['accuracy']
+        r['extra_ms_per_image'] = r['ms_per_image'] - reference['ms_per_image']
+        r['pareto'] = name in front
+        marker = '⭐' if r['pareto'] else '  '
+        print(f"{marker}{name:>16} | {r['views']:>5} | {r['accuracy']:.4f} | {r['miou']:.4f} | "
+              f"{r['macro_f1']:.4f}   | {r['ms_per_image']:7.2f} | {r['delta_macro_f1']:+.4f}  | "
+              f"{r['extra_ms_per_image']:+.2f}")
+    print("⭐ = fronteira de Pareto (melhor F1 para a latência)")
+
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'split': split, 'images': len(images), 'batch_size': batch_size, 'configs': results}, f, indent=2)
+    print(f"💾 Relatório salvo em: {report_path}")
+    return results
+
+if __name__ == "__main__":
+    evaluate_tta('test')
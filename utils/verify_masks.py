@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import random
+from file_catalog import get_catalog
 
 def visualize_masks_sample():
     """
@@ -10,9 +11,10 @@ def visualize_masks_sample():
     """
     train_dir = "train"
     masks_dir = "masks"
+    catalog = get_catalog()
     
     # Pegar algumas amostras aleatórias
-    mask_files = [f for f in os.listdir(masks_dir) if f.endswith('_mask.png')]
+    mask_files = catalog.listdir(masks_dir, suffix='_mask.png')
     samples = random.sample(mask_files, min(6, len(mask_files)))
     
     fig, axes = plt.subplots(2, 3, figsize=(15, 10))
@@ -30,7 +32,7 @@ def visualize_masks_sample():
         img_name = mask_file.replace('_mask.png', '.jpg')
         img_path = os.path.join(train_dir, img_name)
         
-        if os.path.exists(img_path):
+        if catalog.exists(img_path):
             # Carregar imagem original
             img = cv2.imread(img_path)
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
@@ -87,9 +89,10 @@ def count_files():
     """
     Conta arquivos em cada diretório
     """
-    train_images = len([f for f in os.listdir('train') if f.endswith('.jpg')])
-    train_jsons = len([f for f in os.listdir('train') if f.endswith('.json')])
-    masks = len([f for f in os.listdir('masks') if f.endswith('.png')])
+    catalog = get_catalog()
+    train_images = catalog.count('train', suffix='.jpg')
+    train_jsons = catalog.count('train', suffix='.json')
+    masks = catalog.count('masks', suffix='.png')
     
     print("📊 Resumo do dataset:")
     print(f"   🖼️  Imagens de treino: {train_images}")
@@ -97,8 +100,8 @@ def count_files():
     print(f"   🎭 Máscaras geradas: {masks}")
     
     # Verificar classes
-    cat_masks = len([f for f in os.listdir('masks') if f.startswith('cat')])
-    dog_masks = len([f for f in os.listdir('masks') if f.startswith('dog')])
+    cat_masks = catalog.count('masks', prefix='cat')
+    dog_masks = catalog.count('masks', prefix='dog')
     
     print(f"   🐱 Máscaras de gatos: {cat_masks}")
     print(f"   🐶 Máscaras de cachorros: {dog_masks}")
@@ -117,3 +120,4 @@ if __name__ == "__main__":
     
     print("\n" + "="*50 + "\n")
     create_dataset_structure()
+    get_catalog().save()
@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import random
+from file_catalog import get_catalog
 
 def visualize_colored_masks():
     """
@@ -10,10 +11,11 @@ def visualize_colored_masks():
     """
     train_dir = "train"
     masks_dir = "masks"
+    catalog = get_catalog()
     
     # Pegar amostras de gatos e cachorros
-    cat_masks = [f for f in os.listdir(masks_dir) if f.startswith('cat') and f.endswith('_mask.png')]
-    dog_masks = [f for f in os.listdir(masks_dir) if f.startswith('dog') and f.endswith('_mask.png')]
+    cat_masks = catalog.listdir(masks_dir, suffix='_mask.png', prefix='cat')
+    dog_masks = catalog.listdir(masks_dir, suffix='_mask.png', prefix='dog')
     
     # Selecionar 3 de cada
     cat_samples = random.sample(cat_masks, min(3, len(cat_masks)))
@@ -28,7 +30,7 @@ def visualize_colored_masks():
         img_name = mask_file.replace('_mask.png', '.jpg')
         img_path = os.path.join(train_dir, img_name)
         
-        if os.path.exists(img_path):
+        if catalog.exists(img_path):
             img = cv2.imread(img_path)
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             axes[0, i*2].imshow(img)
@@ -50,7 +52,7 @@ def visualize_colored_masks():
         img_name = mask_file.replace('_mask.png', '.jpg')
         img_path = os.path.join(train_dir, img_name)
         
-        if os.path.exists(img_path):
+        if catalog.exists(img_path):
             img = cv2.imread(img_path)
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             axes[1, i*2].imshow(img)
@@ -82,7 +84,7 @@ def analyze_mask_colors():
     cat_count = 0
     dog_count = 0
     
-    for mask_file in os.listdir(masks_dir):
+    for mask_file in get_catalog().listdir(masks_dir):
         if mask_file.endswith('_mask.png'):
             mask_path = os.path.join(masks_dir, mask_file)
             mask = cv2.imread(mask_path)
@@ -112,3 +114,5 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"⚠️  Erro na visualização: {e}")
         print("Verifique se matplotlib está instalado: pip install matplotlib")
+    
+    get_catalog().save()